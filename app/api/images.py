@@ -1,13 +1,17 @@
 """Image API endpoints."""
 from __future__ import annotations
 
+import asyncio
+import functools
 import json
 from datetime import datetime
 from typing import Any, List
 
-from fastapi import APIRouter, Depends, File, Form, Query, UploadFile, status
+from fastapi import APIRouter, Depends, File, Form, Query, Response, UploadFile, status
 from fastapi import HTTPException
-from sqlmodel import Session
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app import crud, models, schemas
 from app.dependencies import PaginationParams, db_session, pagination_params
@@ -19,11 +23,9 @@ router = APIRouter(prefix="/images", tags=["images"])
 def _parse_datetime(value: str | None) -> datetime | None:
     if not value:
         return None
-    normalized = value.strip()
-    if normalized.endswith("Z"):
-        normalized = normalized[:-1] + "+00:00"
     try:
-        return datetime.fromisoformat(normalized)
+        # Python 3.11+ parses a trailing "Z" natively, so no string rewrite is needed.
+        return datetime.fromisoformat(value.strip())
     except ValueError as exc:
         raise HTTPException(
             status_code=422, detail="captured_at must be ISO-8601 datetime"
@@ -45,6 +47,8 @@ def _parse_tags_field(raw: str | None) -> List[str]:
 def _parse_prompt_meta(raw: str | None) -> Any:
     if raw is None or raw == "":
         return None
+    # Reason: stdlib json keeps integers of any width exact (seeds, large ids);
+    # orjson would decode the ones past 64 bits as floats.
     try:
         return json.loads(raw)
     except json.JSONDecodeError:
@@ -61,9 +65,21 @@ def _parse_optional_float(raw: str | None) -> float | None:
 
 
 def _image_to_schema(image: models.Image) -> schemas.ImageRead:
-    data = image.model_dump()
-    data["tags"] = [tag.model_dump() for tag in image.tags]
-    return schemas.ImageRead.model_validate(data)
+    # Tags are eager-loaded by the CRUD queries, so ORM mode can walk them directly.
+    return schemas.ImageRead.model_validate(image)
+
+
+def _json_response(payload: BaseModel, status_code: int = status.HTTP_200_OK) -> Response:
+    """Emit a schema via pydantic-core's JSON serializer, skipping jsonable_encoder.
+
+    Unlike ORJSONResponse, pydantic-core also encodes prompt_meta integers
+    wider than 64 bits.
+    """
+    return Response(
+        content=payload.model_dump_json(),
+        status_code=status_code,
+        media_type="application/json",
+    )
 
 
 def _tags_from_query(raw: str | None) -> List[str]:
@@ -72,7 +88,7 @@ def _tags_from_query(raw: str | None) -> List[str]:
     return [part.strip() for part in raw.split(",") if part.strip()]
 
 
-def _store_upload_or_400(upload: UploadFile, media_type: models.MediaType) -> str:
+async def _store_upload_or_400(upload: UploadFile, media_type: models.MediaType) -> str:
     if not files.is_allowed_upload(upload, media_type):
         allowed = ", ".join(sorted(files.allowed_content_types_for(media_type)))
         raise HTTPException(
@@ -80,11 +96,34 @@ def _store_upload_or_400(upload: UploadFile, media_type: models.MediaType) -> st
             detail=f"Invalid upload type. Allowed content types: {allowed}",
         )
     try:
-        return files.save_upload(upload)
+        return await files.save_upload_async(upload)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
+async def _store_media_and_thumbnail(
+    media_file: UploadFile,
+    media_type: models.MediaType,
+    thumbnail_file: UploadFile | None,
+) -> tuple[str, str | None]:
+    """Save the media file and optional thumbnail concurrently."""
+    uploads = [_store_upload_or_400(media_file, media_type)]
+    if thumbnail_file is not None:
+        uploads.append(_store_upload_or_400(thumbnail_file, models.MediaType.IMAGE))
+    results = await asyncio.gather(*uploads, return_exceptions=True)
+    failures = [result for result in results if isinstance(result, BaseException)]
+    if failures:
+        # Reason: gather lets the other write finish, so remove whatever it stored.
+        await files.delete_media_files_async(
+            *(result for result in results if isinstance(result, str))
+        )
+        raise failures[0]
+    saved_thumbnail = results[1] if len(results) > 1 else None
+    return results[0], saved_thumbnail
+
+
+# Only successful lookups are cached; the domain is None plus the enum values.
+@functools.lru_cache(maxsize=8)
 def _parse_media_type(raw: str | None) -> models.MediaType:
     if raw is None:
         return models.MediaType.IMAGE
@@ -102,9 +141,7 @@ def _require_thumbnail_if_video(media_type: models.MediaType, thumbnail: UploadF
         )
 
 
-@router.get("/", response_model=schemas.ImageListResponse)
-def list_images(
-    pagination: PaginationParams = Depends(pagination_params),
+def _image_filters(
     q: str | None = Query(None),
     tags: str | None = Query(None),
     rating_min: float | None = Query(None, ge=0, le=5),
@@ -112,51 +149,69 @@ def list_images(
     date_from: datetime | None = Query(None),
     date_to: datetime | None = Query(None),
     media_type: models.MediaType | None = Query(None),
-    session: Session = Depends(db_session),
-):
-    filters = crud.ImageFilters(
+) -> crud.ImageFilters:
+    """Build list filters from the shared gallery query parameters."""
+    return crud.ImageFilters(
         q=q,
         tags=_tags_from_query(tags),
         rating_min=rating_min,
         rating_max=rating_max,
         date_from=date_from,
         date_to=date_to,
-        limit=pagination.page_size,
-        offset=pagination.offset,
         media_type=media_type,
     )
-    items, total = crud.list_images(session, filters)
-    return schemas.ImageListResponse(
-        total=total,
-        items=[_image_to_schema(image) for image in items],
+
+
+@router.get("/", response_model=schemas.ImageListResponse)
+async def list_images(
+    pagination: PaginationParams = Depends(pagination_params),
+    filters: crud.ImageFilters = Depends(_image_filters),
+    session: AsyncSession = Depends(db_session),
+) -> Response:
+    filters.limit = pagination.page_size
+    filters.offset = pagination.offset
+    items, total = await crud.list_images(session, filters)
+    return _json_response(
+        schemas.ImageListResponse(
+            total=total,
+            items=schemas.IMAGE_READ_LIST_ADAPTER.validate_python(
+                items, from_attributes=True
+            ),
+        )
     )
 
 
+@router.get("/stream")
+async def stream_images(
+    filters: crud.ImageFilters = Depends(_image_filters),
+    session: AsyncSession = Depends(db_session),
+) -> StreamingResponse:
+    """Stream every matching image as newline-delimited JSON."""
+
+    async def generate():
+        async for image in crud.iter_images(session, filters):
+            yield _image_to_schema(image).model_dump_json().encode() + b"\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
 @router.get("/{image_id}", response_model=schemas.ImageDetail)
-def retrieve_image(
+async def retrieve_image(
     image_id: str,
-    session: Session = Depends(db_session),
-) -> schemas.ImageDetail:
-    image = crud.get_image(session, image_id)
-    dependents = crud.list_dependents(session, image_id)
-    base_data = _image_to_schema(image).model_dump()
-    dependents_payload = [
-        schemas.ImageDependent(
-            id=dep.id,
-            prompt_text=dep.prompt_text,
-            file_name=dep.file_name,
-            thumbnail_file=dep.thumbnail_file,
-            media_type=dep.media_type,
-            captured_at=dep.captured_at,
-        )
-        for dep in dependents
-    ]
-    base_data["dependents"] = dependents_payload
-    return schemas.ImageDetail.model_validate(base_data)
+    session: AsyncSession = Depends(db_session),
+) -> Response:
+    image = await crud.get_image(session, image_id)
+    dependents = await crud.list_dependents(session, image_id)
+    # Both are validated straight from the ORM rows, with no dump/re-validate pass.
+    detail = schemas.ImageDetail.model_validate(image)
+    detail.dependents = schemas.IMAGE_DEPENDENT_LIST_ADAPTER.validate_python(
+        dependents, from_attributes=True
+    )
+    return _json_response(detail)
 
 
 @router.post("/", response_model=schemas.ImageRead, status_code=status.HTTP_201_CREATED)
-def create_image_endpoint(
+async def create_image_endpoint(
     media_file: UploadFile = File(...),
     prompt_text: str = Form(...),
     tags: str | None = Form(None),
@@ -167,15 +222,14 @@ def create_image_endpoint(
     captured_at: str | None = Form(None),
     prompt_meta: str | None = Form(None),
     thumbnail_file: UploadFile | None = File(None),
-    session: Session = Depends(db_session),
-) -> schemas.ImageRead:
+    session: AsyncSession = Depends(db_session),
+) -> Response:
     parsed_media_type = _parse_media_type(media_type)
     _require_thumbnail_if_video(parsed_media_type, thumbnail_file)
 
-    saved_file = _store_upload_or_400(media_file, parsed_media_type)
-    saved_thumbnail: str | None = None
-    if thumbnail_file is not None:
-        saved_thumbnail = _store_upload_or_400(thumbnail_file, models.MediaType.IMAGE)
+    saved_file, saved_thumbnail = await _store_media_and_thumbnail(
+        media_file, parsed_media_type, thumbnail_file
+    )
     try:
         payload = schemas.ImageCreate(
             file_name=saved_file,
@@ -189,48 +243,48 @@ def create_image_endpoint(
             thumbnail_file=saved_thumbnail,
             tags=_parse_tags_field(tags),
         )
-        image = crud.create_image(session, payload)
-        return _image_to_schema(image)
+        image = await crud.create_image(session, payload)
+        return _json_response(_image_to_schema(image), status.HTTP_201_CREATED)
     except Exception:
-        files.delete_media_files(saved_file, saved_thumbnail)
+        await files.delete_media_files_async(saved_file, saved_thumbnail)
         raise
 
 
 @router.put("/{image_id}", response_model=schemas.ImageRead)
-def update_image_endpoint(
+async def update_image_endpoint(
     image_id: str,
     payload: schemas.ImageUpdate,
-    session: Session = Depends(db_session),
-) -> schemas.ImageRead:
-    image = crud.update_image(session, image_id, payload)
-    return _image_to_schema(image)
+    session: AsyncSession = Depends(db_session),
+) -> Response:
+    image = await crud.update_image(session, image_id, payload)
+    return _json_response(_image_to_schema(image))
 
 
 @router.post("/{image_id}/file", response_model=schemas.ImageRead)
-def replace_image_file(
+async def replace_image_file(
     image_id: str,
     media_file: UploadFile = File(...),
-    session: Session = Depends(db_session),
-) -> schemas.ImageRead:
-    image = crud.get_image(session, image_id)
+    session: AsyncSession = Depends(db_session),
+) -> Response:
+    image = await crud.get_image(session, image_id)
     old_file = image.file_name
-    new_file = _store_upload_or_400(media_file, image.media_type)
+    new_file = await _store_upload_or_400(media_file, image.media_type)
     try:
         image.file_name = new_file
-        image.updated_at = datetime.utcnow()
+        image.updated_at = models.utc_now()
         session.add(image)
-        session.commit()
-        session.refresh(image)
+        await session.commit()
+        await session.refresh(image, attribute_names=["file_name", "updated_at", "tags"])
     except Exception:
-        files.delete_file(new_file)
+        await files.delete_media_files_async(new_file)
         raise
-    files.delete_file(old_file)
-    return _image_to_schema(image)
+    await files.delete_media_files_async(old_file)
+    return _json_response(_image_to_schema(image))
 
 
 @router.delete("/{image_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_image_endpoint(
+async def delete_image_endpoint(
     image_id: str,
-    session: Session = Depends(db_session),
+    session: AsyncSession = Depends(db_session),
 ) -> None:
-    crud.delete_image(session, image_id)
+    await crud.delete_image(session, image_id)
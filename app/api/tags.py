@@ -3,28 +3,37 @@ from __future__ import annotations
 
 from fastapi import APIRouter, Depends
 from sqlalchemy import func, select
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app import models, schemas
 from app.dependencies import db_session
+from app.services import tags as tag_service
 
 router = APIRouter(prefix="/tags", tags=["tags"])
 
 
 @router.get("/", response_model=list[schemas.TagUsage])
-def list_tags(session: Session = Depends(db_session)) -> list[schemas.TagUsage]:
+async def list_tags(session: AsyncSession = Depends(db_session)) -> list[schemas.TagUsage]:
+    cache_key = str(session.bind.url)
+    cached = tag_service.cached_tag_usage(cache_key)
+    if cached is not None:
+        return cached
+    generation = tag_service.tag_usage_generation(cache_key)
+
+    # Counting the join key keeps the aggregate on the (tag_id, image_id) index.
     stmt = (
         select(
             models.Tag.name,
-            func.count(models.ImageTagLink.image_id).label("count"),
+            func.count(models.ImageTagLink.tag_id).label("count"),
         )
-        .join(
+        .outerjoin(
             models.ImageTagLink,
             models.Tag.id == models.ImageTagLink.tag_id,
-            isouter=True,
         )
         .group_by(models.Tag.id)
         .order_by(models.Tag.name)
     )
-    results = session.exec(stmt).all()
-    return [schemas.TagUsage(name=row[0], count=row[1]) for row in results]
+    results = (await session.exec(stmt)).all()
+    usage = [schemas.TagUsage(name=row[0], count=row[1]) for row in results]
+    tag_service.store_tag_usage(cache_key, usage, generation)
+    return usage
@@ -14,10 +14,18 @@ class Settings(BaseSettings):
     app_name: str = "AI Image Library"
     database_path: Path = Path("app.db")
     images_dir: Path = Path("images")
+    db_pool_size: int = 20
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = 1800
 
     @property
     def database_url(self) -> str:
         return f"sqlite:///{self.database_path}"
 
+    @property
+    def async_database_url(self) -> str:
+        return f"sqlite+aiosqlite:///{self.database_path}"
+
 
 settings = Settings()
@@ -3,15 +3,16 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Iterable, List, Tuple
+from typing import AsyncIterator, Iterable, List, Tuple
 
 from fastapi import HTTPException
-from sqlalchemy import func, or_
+from sqlalchemy import delete, func, insert, or_
 from sqlalchemy.orm import selectinload
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app import models, schemas
-from app.services import files, tags as tag_service
+from app.services import files, search, tags as tag_service
 
 
 @dataclass
@@ -29,19 +30,56 @@ class ImageFilters:
     media_type: models.MediaType | None = None
 
 
+# Above this many tags a single grouped subquery beats chaining EXISTS clauses.
+_MAX_EXISTS_TAG_FILTERS = 8
+
+
 def _normalized_tags(names: Iterable[str]) -> list[str]:
-    normalized = []
-    for name in names:
-        normalized_name = tag_service.normalize_tag(name) if isinstance(name, str) else ""
-        if normalized_name:
-            normalized.append(normalized_name)
-    return sorted(set(normalized))
+    # Reason: dedupe while normalizing so sorting only sees the unique names.
+    return sorted(
+        {
+            normalized
+            for name in names
+            if isinstance(name, str) and (normalized := tag_service.normalize_tag(name))
+        }
+    )
+
+
+@dataclass
+class _CompiledFilters:
+    """Filter values normalized once so every query built from them reuses the work."""
+
+    match_query: str | None
+    like_value: str | None
+    normalized_tags: List[str]
+    rating_min: float | None
+    rating_max: float | None
+    date_from: datetime | None
+    date_to: datetime | None
+    media_type: models.MediaType | None
 
 
-def _apply_filters(stmt, filters: ImageFilters):
+def _compile_filters(filters: ImageFilters) -> _CompiledFilters:
     normalized_q = filters.q.strip().lower() if filters.q else None
-    if normalized_q:
-        like_value = f"%{normalized_q}%"
+    match_query = search.build_match_query(normalized_q) if normalized_q else None
+    return _CompiledFilters(
+        match_query=match_query,
+        # LIKE only covers queries the trigram index cannot answer exactly.
+        like_value=f"%{normalized_q}%" if normalized_q and not match_query else None,
+        normalized_tags=_normalized_tags(filters.tags),
+        rating_min=filters.rating_min,
+        rating_max=filters.rating_max,
+        date_from=filters.date_from,
+        date_to=filters.date_to,
+        media_type=filters.media_type,
+    )
+
+
+def _apply_filters(stmt, filters: _CompiledFilters):
+    like_value = filters.like_value
+    if filters.match_query:
+        stmt = stmt.where(search.image_matches(filters.match_query))
+    elif like_value:
         stmt = stmt.where(
             or_(
                 func.lower(models.Image.prompt_text).like(like_value),
@@ -60,8 +98,23 @@ def _apply_filters(stmt, filters: ImageFilters):
     if filters.date_to is not None:
         stmt = stmt.where(models.Image.captured_at <= filters.date_to)
 
-    normalized_tags = _normalized_tags(filters.tags)
-    if normalized_tags:
+    normalized_tags = filters.normalized_tags
+    if normalized_tags and len(normalized_tags) <= _MAX_EXISTS_TAG_FILTERS:
+        # Reason: one correlated EXISTS per tag lets SQLite probe the
+        # (tag_id, image_id) link index instead of materializing a GROUP BY.
+        stmt = stmt.where(
+            *(
+                select(models.ImageTagLink.image_id)
+                .join(models.Tag, models.Tag.id == models.ImageTagLink.tag_id)
+                .where(
+                    models.ImageTagLink.image_id == models.Image.id,
+                    models.Tag.name == tag_name,
+                )
+                .exists()
+                for tag_name in normalized_tags
+            )
+        )
+    elif normalized_tags:
         link_stmt = (
             select(models.ImageTagLink.image_id)
             .join(models.Tag, models.Tag.id == models.ImageTagLink.tag_id)
@@ -77,43 +130,74 @@ def _apply_filters(stmt, filters: ImageFilters):
     return stmt
 
 
-def list_images(session: Session, filters: ImageFilters | None = None) -> Tuple[list[models.Image], int]:
-    """Return images that match the given filters."""
-    filters = filters or ImageFilters()
-
-    base_query = select(models.Image).options(selectinload(models.Image.tags))
-    filtered_query = _apply_filters(base_query, filters)
-    filtered_query = filtered_query.order_by(
+def _order_for_listing(stmt):
+    return stmt.order_by(
         models.Image.captured_at.desc().nullslast(),
         models.Image.created_at.desc(),
     )
 
-    count_subquery = _apply_filters(select(models.Image.id), filters).subquery()
-    total_result = session.exec(select(func.count()).select_from(count_subquery)).one()
-    total = total_result[0] if isinstance(total_result, tuple) else total_result
 
-    result = session.exec(
-        filtered_query.offset(filters.offset).limit(filters.limit)
-    ).all()
-    return result, total
+async def list_images(
+    session: AsyncSession, filters: ImageFilters | None = None
+) -> Tuple[list[models.Image], int]:
+    """Return images that match the given filters."""
+    filters = filters or ImageFilters()
+    compiled = _compile_filters(filters)
 
+    # Reason: the window count is evaluated before LIMIT/OFFSET, so every page
+    # row carries the full match total and no separate COUNT query is needed.
+    base_query = select(models.Image, func.count().over().label("total")).options(
+        selectinload(models.Image.tags)
+    )
+    filtered_query = _order_for_listing(_apply_filters(base_query, compiled))
 
-def get_image(session: Session, image_id: str) -> models.Image:
+    rows = (
+        await session.exec(filtered_query.offset(filters.offset).limit(filters.limit))
+    ).all()
+    if rows:
+        return [row[0] for row in rows], rows[0].total
+
+    if filters.offset == 0:
+        return [], 0
+    # Pages past the end return no rows to read the window total from.
+    count_subquery = _apply_filters(select(models.Image.id), compiled).subquery()
+    total = await session.scalar(select(func.count()).select_from(count_subquery))
+    return [], total or 0
+
+
+async def iter_images(
+    session: AsyncSession,
+    filters: ImageFilters | None = None,
+    batch_size: int = 64,
+) -> AsyncIterator[models.Image]:
+    """Yield every image matching the filters, fetching rows in batches.
+
+    Pagination fields on the filters are ignored; callers stream the full match.
+    """
+    compiled = _compile_filters(filters or ImageFilters())
+    stmt = select(models.Image).options(selectinload(models.Image.tags))
+    stmt = _order_for_listing(_apply_filters(stmt, compiled))
+    result = await session.stream_scalars(stmt.execution_options(yield_per=batch_size))
+    async for image in result:
+        yield image
+
+
+async def get_image(session: AsyncSession, image_id: str) -> models.Image:
     """Fetch a single image by ID or raise 404."""
     stmt = (
         select(models.Image)
         .options(selectinload(models.Image.tags))
         .where(models.Image.id == image_id)
     )
-    image = session.exec(stmt).first()
+    image = (await session.exec(stmt)).first()
     if image is None:
         raise HTTPException(status_code=404, detail="Image not found")
     return image
 
 
-def create_image(session: Session, data: schemas.ImageCreate) -> models.Image:
+async def create_image(session: AsyncSession, data: schemas.ImageCreate) -> models.Image:
     """Persist a new image record."""
-    image = models.Image(
+    image = models.Image.create(
         file_name=data.file_name,
         media_type=data.media_type,
         prompt_text=data.prompt_text,
@@ -124,13 +208,26 @@ def create_image(session: Session, data: schemas.ImageCreate) -> models.Image:
         captured_at=data.captured_at,
         thumbnail_file=data.thumbnail_file,
     )
-    image.tags = tag_service.ensure_tags(session, data.tags)
+    # Untagged uploads skip the greenlet hop into the sync tag helper.
+    tags = await session.run_sync(tag_service.ensure_tags, data.tags) if data.tags else []
     session.add(image)
-    session.commit()
-    session.refresh(image)
+    await session.flush()
+    await _insert_tag_links(session, image.id, tags)
+    await session.commit()
+    tag_service.invalidate_tag_usage()
+    await session.refresh(image, attribute_names=["tags"])
     return image
 
 
+async def _insert_tag_links(
+    session: AsyncSession, image_id: str, tags: Iterable[models.Tag]
+) -> None:
+    """Link tags to an image with one multi-row INSERT instead of one per tag."""
+    rows = [{"image_id": image_id, "tag_id": tag.id} for tag in tags]
+    if rows:
+        await session.exec(insert(models.ImageTagLink).values(rows))
+
+
 def _validate_and_normalize_updates(
     image: models.Image, updates: dict
 ) -> dict:
@@ -160,9 +257,11 @@ def _validate_and_normalize_updates(
     return updates
 
 
-def update_image(session: Session, image_id: str, data: schemas.ImageUpdate) -> models.Image:
+async def update_image(
+    session: AsyncSession, image_id: str, data: schemas.ImageUpdate
+) -> models.Image:
     """Update an image record with new metadata."""
-    image = get_image(session, image_id)
+    image = await get_image(session, image_id)
     update_payload = data.model_dump(exclude_unset=True)
     tag_names = update_payload.pop("tags", None)
 
@@ -176,30 +275,39 @@ def update_image(session: Session, image_id: str, data: schemas.ImageUpdate) ->
         setattr(image, field, value)
 
     if tag_names is not None:
-        image.tags = tag_service.ensure_tags(session, tag_names)
+        tags = (
+            await session.run_sync(tag_service.ensure_tags, tag_names) if tag_names else []
+        )
+        await session.exec(
+            delete(models.ImageTagLink).where(models.ImageTagLink.image_id == image.id)
+        )
+        await _insert_tag_links(session, image.id, tags)
 
-    image.updated_at = datetime.utcnow()
+    image.updated_at = models.utc_now()
     session.add(image)
-    session.commit()
-    session.refresh(image)
+    await session.commit()
+    if tag_names is not None:
+        tag_service.invalidate_tag_usage()
+    await session.refresh(image, attribute_names=["tags"])
     return image
 
 
-def delete_image(session: Session, image_id: str) -> None:
+async def delete_image(session: AsyncSession, image_id: str) -> None:
     """Remove an image record."""
-    image = get_image(session, image_id)
+    image = await get_image(session, image_id)
     file_name = image.file_name
     thumbnail_name = image.thumbnail_file
-    session.delete(image)
-    session.commit()
-    files.delete_media_files(file_name, thumbnail_name)
+    await session.delete(image)
+    await session.commit()
+    tag_service.invalidate_tag_usage()
+    await files.delete_media_files_async(file_name, thumbnail_name)
 
 
-def list_dependents(session: Session, image_id: str) -> list[models.Image]:
+async def list_dependents(session: AsyncSession, image_id: str) -> list[models.Image]:
     """Return images whose prompt references include the given image."""
     dependents: list[models.Image] = []
     stmt = select(models.Image)
-    for candidate in session.exec(stmt):
+    for candidate in await session.exec(stmt):
         if _references_image(candidate.prompt_meta, image_id):
             dependents.append(candidate)
     return dependents
@@ -1,18 +1,22 @@
 """FastAPI dependency helpers."""
 from __future__ import annotations
 
+from typing import NamedTuple
+
 from fastapi import Depends, Query
-from pydantic import BaseModel, Field
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from .database import get_session as db_get_session
 
 
-class PaginationParams(BaseModel):
-    """Pagination model for list endpoints."""
+class PaginationParams(NamedTuple):
+    """Pagination values for list endpoints.
+
+    Bounds are enforced by the ``Query`` declarations in ``pagination_params``.
+    """
 
-    page: int = Field(default=1, ge=1)
-    page_size: int = Field(default=20, ge=1, le=100)
+    page: int = 1
+    page_size: int = 20
 
     @property
     def offset(self) -> int:
@@ -24,9 +28,9 @@ def pagination_params(
     page_size: int = Query(20, ge=1, le=100),
 ) -> PaginationParams:
     """Build pagination parameters from query values."""
-    return PaginationParams(page=page, page_size=page_size)
+    return PaginationParams(page, page_size)
 
 
-def db_session(session: Session = Depends(db_get_session)) -> Session:
-    """Expose the SQLModel session as a dependency."""
+async def db_session(session: AsyncSession = Depends(db_get_session)) -> AsyncSession:
+    """Expose the async SQLModel session as a dependency."""
     return session
@@ -0,0 +1,22 @@
+"""JSON decoding that is fast with orjson but keeps stdlib semantics."""
+from __future__ import annotations
+
+import json
+import re
+from typing import Any
+
+import orjson
+
+# Reason: orjson decodes integers of 19+ digits past its 64-bit range as
+# floats and rejects NaN/Infinity, both of which the stdlib parses exactly.
+# A match inside a string is harmless; it only costs the slower parser.
+_STDLIB_ONLY = re.compile(r"\d{19}|NaN|Infinity")
+_STDLIB_ONLY_BYTES = re.compile(rb"\d{19}|NaN|Infinity")
+
+
+def loads(data: str | bytes) -> Any:
+    """Parse JSON text with orjson unless it needs the stdlib to stay exact."""
+    pattern = _STDLIB_ONLY_BYTES if isinstance(data, bytes) else _STDLIB_ONLY
+    if pattern.search(data):
+        return json.loads(data)
+    return orjson.loads(data)
@@ -5,13 +5,12 @@ from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
-from sqlmodel import SQLModel
 
 from .api import images_router, tags_router
 from .config import settings
-from .database import engine
+from .database import create_schema, engine
 from . import models  # noqa: F401 ensures models registered
 
 STATIC_ROOT = Path(__file__).resolve().parent / "static"
@@ -20,11 +19,16 @@ STATIC_ROOT = Path(__file__).resolve().parent / "static"
 @asynccontextmanager
 async def lifespan(_: FastAPI):
     """Prepare application resources on startup."""
-    SQLModel.metadata.create_all(engine)
+    async with engine.begin() as connection:
+        await connection.run_sync(create_schema)
     yield
 
 
-app = FastAPI(title=settings.app_name, lifespan=lifespan)
+app = FastAPI(
+    title=settings.app_name,
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 app.include_router(images_router, prefix="/api")
 app.include_router(tags_router, prefix="/api")
 app.mount(
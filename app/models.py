@@ -1,19 +1,31 @@
 """SQLModel declarative models."""
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
 from typing import List, Optional
 from uuid import uuid4
 
 from pydantic import BaseModel, ConfigDict, field_validator, model_validator
-from sqlalchemy import Column, Float, JSON
+from sqlalchemy import Column, Float, Index, JSON
 from sqlmodel import Field, Relationship, SQLModel
 
 from app.prompt_meta import PromptMetaType, validate_prompt_meta_structure
 
 
+def utc_now() -> datetime:
+    """Return the current UTC time as a naive datetime.
+
+    Timestamps are stored naive in SQLite and read back that way, so new
+    values stay naive too; this replaces the deprecated ``datetime.utcnow``.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 class ImageTagLink(SQLModel, table=True):
     """Association table linking images and tags."""
 
+    # Reverse (tag -> images) lookups for tag filters; the PK covers image -> tags.
+    __table_args__ = (Index("ix_imagetag_tagid_imageid", "tag_id", "image_id"),)
+
     image_id: str = Field(foreign_key="image.id", primary_key=True)
     tag_id: int = Field(foreign_key="tag.id", primary_key=True)
 
@@ -28,14 +40,18 @@ class MediaType(str, Enum):
 class ImageValidator(BaseModel):
     """Pydantic helper ensuring prompt metadata + rating are valid."""
 
-    model_config = ConfigDict(extra="allow")
+    # Image.create passes every column; only the fields below are checked, so
+    # the rest are dropped instead of being copied into model extras.
+    model_config = ConfigDict(extra="ignore")
 
     prompt_meta: PromptMetaType = None
     rating: float | None = None
     media_type: MediaType = MediaType.IMAGE
     thumbnail_file: str | None = None
 
-    @field_validator("prompt_meta", mode="before")
+    # Reason: the structure check already covers every accepted shape, so a
+    # plain validator skips pydantic's union pass (and its copy of the list).
+    @field_validator("prompt_meta", mode="plain")
     @classmethod
     def _validate_prompt_meta(cls, value: PromptMetaType) -> PromptMetaType:
         return validate_prompt_meta_structure(value)
@@ -63,6 +79,14 @@ class ImageValidator(BaseModel):
 class Image(SQLModel, table=True):
     """Image metadata persisted in SQLite."""
 
+    # Match list_images: media_type filter plus the captured_at/created_at sort,
+    # and the same sort (or a captured_at range) without a media_type filter.
+    __table_args__ = (
+        Index("ix_image_sort", "media_type", "captured_at", "created_at"),
+        Index("ix_image_captured_created", "captured_at", "created_at"),
+        Index("ix_image_rating", "rating"),
+    )
+
     id: str = Field(default_factory=lambda: str(uuid4()), primary_key=True)
     file_name: str
     media_type: MediaType = Field(default=MediaType.IMAGE, index=True)
@@ -73,16 +97,22 @@ class Image(SQLModel, table=True):
     rating: float | None = Field(default=None, ge=0, le=5, sa_column=Column(Float))
     thumbnail_file: str | None = None
     captured_at: datetime | None = None
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=utc_now)
+    updated_at: datetime = Field(default_factory=utc_now)
 
     tags: List["Tag"] = Relationship(back_populates="images", link_model=ImageTagLink)
 
-    def __init__(self, **data):
+    @classmethod
+    def create(cls, **data) -> "Image":
+        """Validate metadata, rating, and media fields, then build an Image.
+
+        Table models skip pydantic validation on construction, so writers go
+        through this factory while loaded rows are hydrated without it.
+        """
         validated = ImageValidator.model_validate(data)
         data["prompt_meta"] = validated.prompt_meta
         data["rating"] = validated.rating
-        super().__init__(**data)
+        return cls(**data)
 
 
 class Tag(SQLModel, table=True):
@@ -10,34 +10,36 @@ class PromptMetaFormatError(ValueError):
     """Raised when prompt metadata is in an invalid shape."""
 
 
+_EMPTY_LIST_MESSAGE = "prompt reference lists must include a trailing prompt string"
+_TRAILING_TEXT_MESSAGE = "prompt reference lists must end with the prompt text string"
+_REFERENCE_ID_MESSAGE = "prompt references must include an 'id' field"
+_REFERENCE_ID_TYPE_MESSAGE = "prompt reference ids must be non-empty strings"
+_UNSUPPORTED_MESSAGE = "prompt metadata must be a string, dict, or prompt reference list"
+
+
 def validate_prompt_meta_structure(value: PromptMetaType) -> PromptMetaType:
     """Ensure prompt metadata matches the `[refs..., text]` contract."""
-    if value is None or isinstance(value, (str, dict)):
+    # Reason: decoded JSON only produces exact builtin types, so identity
+    # checks on type() settle nearly every value before isinstance runs.
+    value_type = type(value)
+    if value is None or value_type is str or value_type is dict:
         return value
-    if isinstance(value, list):
+    if value_type is list or isinstance(value, list):
         if not value:
-            raise PromptMetaFormatError(
-                "prompt reference lists must include a trailing prompt string"
-            )
-        *references, prompt_text = value
+            raise PromptMetaFormatError(_EMPTY_LIST_MESSAGE)
+        prompt_text = value[-1]
         if not isinstance(prompt_text, str):
-            raise PromptMetaFormatError(
-                "prompt reference lists must end with the prompt text string"
-            )
-        for ref in references:
+            raise PromptMetaFormatError(_TRAILING_TEXT_MESSAGE)
+        for ref in value[:-1]:
             if not isinstance(ref, dict) or "id" not in ref:
-                raise PromptMetaFormatError(
-                    "prompt references must include an 'id' field"
-                )
+                raise PromptMetaFormatError(_REFERENCE_ID_MESSAGE)
             ref_id = ref["id"]
             if not isinstance(ref_id, str) or not ref_id:
-                raise PromptMetaFormatError(
-                    "prompt reference ids must be non-empty strings"
-                )
+                raise PromptMetaFormatError(_REFERENCE_ID_TYPE_MESSAGE)
+        return value
+    if isinstance(value, (str, dict)):
         return value
-    raise PromptMetaFormatError(
-        "prompt metadata must be a string, dict, or prompt reference list"
-    )
+    raise PromptMetaFormatError(_UNSUPPORTED_MESSAGE)
 
 
 def extract_prompt_text(value: PromptMetaType) -> str:
@@ -52,6 +54,4 @@ def extract_prompt_text(value: PromptMetaType) -> str:
     if isinstance(value, dict):
         # Legacy metadata dictionaries may carry additional info without text.
         return ""
-    raise PromptMetaFormatError(
-        "prompt metadata must be a string, dict, or prompt reference list"
-    )
+    raise PromptMetaFormatError(_UNSUPPORTED_MESSAGE)
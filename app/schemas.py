@@ -2,15 +2,17 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, List, Optional
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, field_validator
 
 from app.models import MediaType
 from app.prompt_meta import PromptMetaType, validate_prompt_meta_structure
 
 
 class TagRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     name: str
 
@@ -21,6 +23,8 @@ class TagUsage(BaseModel):
 
 
 class ImageDependent(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: str
     prompt_text: str
     file_name: str
@@ -33,7 +37,8 @@ class ImageBase(BaseModel):
     file_name: str
     media_type: MediaType = MediaType.IMAGE
     prompt_text: str
-    prompt_meta: PromptMetaType = None
+    # Any skips pydantic's union matching; the before-validator enforces the shape.
+    prompt_meta: Any = None
     ai_model: Optional[str] = None
     notes: Optional[str] = None
     rating: Optional[float] = Field(default=None, ge=0, le=5)
@@ -43,7 +48,7 @@ class ImageBase(BaseModel):
 
     @field_validator("prompt_meta", mode="before")
     @classmethod
-    def _validate_prompt_meta(cls, value: PromptMetaType) -> PromptMetaType:
+    def _validate_prompt_meta(cls, value: Any) -> PromptMetaType:
         return validate_prompt_meta_structure(value)
 
 
@@ -53,7 +58,8 @@ class ImageCreate(ImageBase):
 
 class ImageUpdate(BaseModel):
     prompt_text: Optional[str] = None
-    prompt_meta: PromptMetaType = None
+    # Any skips pydantic's union matching; the before-validator enforces the shape.
+    prompt_meta: Any = None
     ai_model: Optional[str] = None
     notes: Optional[str] = None
     rating: Optional[float] = Field(default=None, ge=0, le=5)
@@ -64,17 +70,25 @@ class ImageUpdate(BaseModel):
 
     @field_validator("prompt_meta", mode="before")
     @classmethod
-    def _validate_prompt_meta(cls, value: PromptMetaType) -> PromptMetaType:
+    def _validate_prompt_meta(cls, value: Any) -> PromptMetaType:
         return validate_prompt_meta_structure(value)
 
 
 class ImageRead(ImageBase):
+    model_config = ConfigDict(from_attributes=True)
+
     id: str
     created_at: datetime
     updated_at: datetime
     tags: List[TagRead] = Field(default_factory=list)
 
 
+# Validates a whole page of ORM rows in one pydantic-core call. Measured faster
+# than model_construct, whose per-field work runs in Python rather than Rust.
+IMAGE_READ_LIST_ADAPTER = TypeAdapter(List[ImageRead])
+IMAGE_DEPENDENT_LIST_ADAPTER = TypeAdapter(List[ImageDependent])
+
+
 class ImageListResponse(BaseModel):
     items: List[ImageRead]
     total: int
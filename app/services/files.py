@@ -1,25 +1,38 @@
 """File-system helpers for storing image uploads."""
 from __future__ import annotations
 
+import asyncio
+import functools
 import logging
+import os
 import re
 import shutil
+import string
 from pathlib import Path
+from typing import BinaryIO
 from uuid import uuid4
 
+import aiofiles
 from fastapi import UploadFile
 
 from app.config import settings
 from app.models import MediaType
 
-IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp"}
-VIDEO_EXTENSIONS = {".mp4", ".mov", ".webm", ".mkv"}
+# Frozen so the importer and upload checks can share them without copying.
+IMAGE_EXTENSIONS = frozenset({".png", ".jpg", ".jpeg", ".webp"})
+VIDEO_EXTENSIONS = frozenset({".mp4", ".mov", ".webm", ".mkv"})
 ALLOWED_EXTENSIONS = IMAGE_EXTENSIONS | VIDEO_EXTENSIONS
 
-IMAGE_CONTENT_TYPES = {"image/png", "image/jpeg", "image/webp"}
-VIDEO_CONTENT_TYPES = {"video/mp4", "video/webm", "video/quicktime"}
+IMAGE_CONTENT_TYPES = frozenset({"image/png", "image/jpeg", "image/webp"})
+VIDEO_CONTENT_TYPES = frozenset({"video/mp4", "video/webm", "video/quicktime"})
 ALLOWED_CONTENT_TYPES = IMAGE_CONTENT_TYPES | VIDEO_CONTENT_TYPES
 _SAFE_NAME_PATTERN = re.compile(r"[^A-Za-z0-9._-]")
+_SAFE_NAME_CHARS = frozenset(string.ascii_letters + string.digits + "._-")
+# Same allowlist as _SAFE_NAME_PATTERN as a translate table for ASCII names.
+_SAFE_ASCII_TABLE = {
+    code: chr(code) if chr(code) in _SAFE_NAME_CHARS else "_" for code in range(128)
+}
+UPLOAD_CHUNK_SIZE = 1 << 20
 
 logger = logging.getLogger(__name__)
 
@@ -32,51 +45,137 @@ def sanitize_storage_name(name: str) -> str:
     """Normalize inbound filenames to prevent traversal."""
     if not name:
         raise ValueError("filename is required")
-    base = Path(name).name
-    sanitized = _SAFE_NAME_PATTERN.sub("_", base)
+    base = os.path.basename(name)
+    # Reason: str.translate is a C-level table lookup, cheaper than a regex
+    # substitution; non-ASCII names still go through the pattern.
+    if base.isascii():
+        sanitized = base.translate(_SAFE_ASCII_TABLE)
+    else:
+        sanitized = _SAFE_NAME_PATTERN.sub("_", base)
     if not sanitized or sanitized in {".", ".."}:
         raise ValueError("invalid filename")
     return sanitized
 
 
+@functools.lru_cache(maxsize=8)
+def _images_root(images_dir: Path) -> Path:
+    """Resolve (and create) the images directory once per configured path."""
+    root = images_dir.resolve()
+    _ensure_directory(root)
+    return root
+
+
+def _open_in_images(path: str | os.PathLike[str], flags: int, mode: int = 0o666) -> int:
+    """``os.open`` a file under the images root, recreating the directory if needed."""
+    try:
+        return os.open(path, flags, mode)
+    except FileNotFoundError:
+        # Reason: _images_root creates the directory only once per process; if
+        # it was removed or remounted since, recreate it instead of failing.
+        _ensure_directory(Path(path).parent)
+        return os.open(path, flags, mode)
+
+
 def _resolve_images_path(file_name: str) -> Path:
     safe_name = sanitize_storage_name(file_name)
-    images_root = settings.images_dir.resolve()
-    destination = (settings.images_dir / safe_name).resolve()
-    try:
-        destination.relative_to(images_root)
-    except ValueError as exc:  # path escapes image dir
-        raise ValueError("file path escapes images directory") from exc
-    _ensure_directory(images_root)
+    images_root = _images_root(settings.images_dir)
+    # Reason: the root is already absolute, so normpath plus a parts compare
+    # checks containment without another filesystem resolve per file.
+    destination = Path(os.path.normpath(images_root / safe_name))
+    if destination.parts[: len(images_root.parts)] != images_root.parts:
+        raise ValueError("file path escapes images directory")
     return destination
 
 
-def allowed_extensions_for(media_type: MediaType) -> set[str]:
+def _upload_suffix(upload: UploadFile) -> str:
+    # Reason: os.path.splitext works on the string directly, with no Path allocation.
+    return os.path.splitext(upload.filename or "")[1].lower()
+
+
+def allowed_extensions_for(media_type: MediaType) -> frozenset[str]:
     return IMAGE_EXTENSIONS if media_type == MediaType.IMAGE else VIDEO_EXTENSIONS
 
 
-def allowed_content_types_for(media_type: MediaType) -> set[str]:
+def allowed_content_types_for(media_type: MediaType) -> frozenset[str]:
     return IMAGE_CONTENT_TYPES if media_type == MediaType.IMAGE else VIDEO_CONTENT_TYPES
 
 
 def is_allowed_upload(upload: UploadFile, media_type: MediaType = MediaType.IMAGE) -> bool:
     """Return True if the upload's extension & content type are allowed."""
-    suffix = Path(upload.filename or "").suffix.lower()
+    suffix = _upload_suffix(upload)
     return suffix in allowed_extensions_for(media_type) and (
         upload.content_type in allowed_content_types_for(media_type)
     )
 
 
-def save_upload(upload: UploadFile) -> str:
-    """Persist an uploaded file and return its relative filename."""
-    suffix = Path(upload.filename or "").suffix.lower()
+def _upload_destination(upload: UploadFile) -> tuple[str, Path]:
+    """Pick a fresh stored name (and its path) for an allowed upload."""
+    suffix = _upload_suffix(upload)
     if suffix not in ALLOWED_EXTENSIONS:
         raise ValueError("unsupported file extension")
     destination_name = f"{uuid4().hex}{suffix}"
-    destination = _resolve_images_path(destination_name)
+    return destination_name, _resolve_images_path(destination_name)
+
+
+def _sendfile_source(source: BinaryIO) -> int | None:
+    """Return a descriptor to sendfile ``source`` from, or None to stream it."""
+    # Windows has no os.sendfile at all.
+    if not hasattr(os, "sendfile"):
+        return None
+    # Reason: fileno() makes an in-memory SpooledTemporaryFile roll over to a
+    # temp file (an extra full copy), so spools still in memory are skipped the
+    # same way Starlette's UploadFile checks ``_rolled``.
+    if not getattr(source, "_rolled", True):
+        return None
+    try:
+        return source.fileno()
+    except (AttributeError, OSError):
+        return None
+
+
+def _sendfile_into(source_fd: int, destination: Path) -> bool:
+    """Copy the whole of ``source_fd`` into ``destination`` in the kernel.
+
+    Returns False when the platform lacks file-to-file sendfile; callers then
+    stream the upload instead, reopening (and truncating) the destination.
+    """
+    offset = 0
+    try:
+        with open(destination, "wb", opener=_open_in_images) as buffer:
+            while sent := os.sendfile(buffer.fileno(), source_fd, offset, UPLOAD_CHUNK_SIZE):
+                offset += sent
+    except OSError:
+        return False
+    return True
+
+
+def save_upload(upload: UploadFile) -> str:
+    """Persist an uploaded file and return its relative filename."""
+    destination_name, destination = _upload_destination(upload)
     upload.file.seek(0)
-    with destination.open("wb") as buffer:
-        shutil.copyfileobj(upload.file, buffer)
+    source_fd = _sendfile_source(upload.file)
+    if source_fd is None or not _sendfile_into(source_fd, destination):
+        with open(destination, "wb", opener=_open_in_images) as buffer:
+            shutil.copyfileobj(upload.file, buffer, UPLOAD_CHUNK_SIZE)
+    return destination_name
+
+
+async def save_upload_async(upload: UploadFile) -> str:
+    """Stream an uploaded file to disk in chunks without blocking the event loop.
+
+    Uploads Starlette has already spooled to disk are copied with sendfile in
+    a worker thread; in-memory ones are written chunk by chunk.
+    """
+    destination_name, destination = _upload_destination(upload)
+    await upload.seek(0)
+    source_fd = _sendfile_source(upload.file)
+    if source_fd is not None and await asyncio.to_thread(
+        _sendfile_into, source_fd, destination
+    ):
+        return destination_name
+    async with aiofiles.open(destination, "wb", opener=_open_in_images) as buffer:
+        while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+            await buffer.write(chunk)
     return destination_name
 
 
@@ -85,11 +184,22 @@ def copy_into_images(source: Path, target_name: str) -> str:
     destination = _resolve_images_path(target_name)
     base = destination.stem
     suffix = destination.suffix
-    counter = 1
-    while destination.exists():
-        destination = destination.with_name(f"{base}_{counter}{suffix}")
-        counter += 1
-    shutil.copy2(source, destination)
+    # Reason: O_EXCL reserves the name atomically, so a collision costs one
+    # failed open instead of a stat per existing duplicate, and concurrent
+    # importers cannot both claim the same name.
+    while True:
+        try:
+            fd = _open_in_images(destination, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            destination = destination.with_name(f"{base}_{uuid4().hex[:8]}{suffix}")
+            continue
+        os.close(fd)
+        break
+    try:
+        shutil.copy2(source, destination)
+    except BaseException:
+        destination.unlink(missing_ok=True)
+        raise
     return destination.name
 
 
@@ -116,3 +226,8 @@ def delete_media_files(*file_names: str | None) -> None:
             continue
         seen.add(name)
         delete_file(name)
+
+
+async def delete_media_files_async(*file_names: str | None) -> None:
+    """Async wrapper running delete_media_files in a worker thread."""
+    await asyncio.to_thread(delete_media_files, *file_names)
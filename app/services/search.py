@@ -0,0 +1,133 @@
+"""SQLite FTS5 index over image prompt text, notes, and model names."""
+from __future__ import annotations
+
+from sqlalchemy import Connection, column, literal_column, select, table, text
+
+# The image primary key is a TEXT uuid, so image.rowid is only the implicit
+# rowid, which VACUUM may renumber. The index is therefore keyed on
+# image_search_key.key, an INTEGER PRIMARY KEY that SQLite never renumbers,
+# mapped one-to-one onto image.id. image_fts is contentless (content=''):
+# triggers feed it the text, so the text itself is not stored twice. The
+# trigram tokenizer (SQLite 3.34+) indexes every three-character run, so a
+# quoted query matches any substring exactly like the LIKE '%q%' it replaces.
+_KEY_TABLE_STATEMENT = """
+    CREATE TABLE IF NOT EXISTS image_search_key (
+        key INTEGER PRIMARY KEY,
+        image_id TEXT NOT NULL UNIQUE
+    )
+"""
+_FTS_TABLE_STATEMENT = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS image_fts USING fts5(
+        prompt_text, notes, ai_model, content='', tokenize='trigram'
+    )
+"""
+# Marks the current image_fts layout; tables built before it are rebuilt.
+_FTS_LAYOUT_MARKER = "content=''"
+_SEARCH_KEY = "(SELECT key FROM image_search_key WHERE image_id = {row}.id)"
+_FTS_TRIGGERS = (
+    "image_fts_after_insert",
+    "image_fts_after_delete",
+    "image_fts_after_update",
+)
+_FTS_TRIGGER_STATEMENTS = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS image_fts_after_insert AFTER INSERT ON image BEGIN
+        INSERT INTO image_search_key(image_id) VALUES (new.id);
+        INSERT INTO image_fts(rowid, prompt_text, notes, ai_model)
+        VALUES ({_SEARCH_KEY.format(row="new")}, new.prompt_text, new.notes, new.ai_model);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS image_fts_after_delete AFTER DELETE ON image BEGIN
+        INSERT INTO image_fts(image_fts, rowid, prompt_text, notes, ai_model)
+        VALUES (
+            'delete', {_SEARCH_KEY.format(row="old")},
+            old.prompt_text, old.notes, old.ai_model
+        );
+        DELETE FROM image_search_key WHERE image_id = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS image_fts_after_update
+    AFTER UPDATE OF prompt_text, notes, ai_model ON image BEGIN
+        INSERT INTO image_fts(image_fts, rowid, prompt_text, notes, ai_model)
+        VALUES (
+            'delete', {_SEARCH_KEY.format(row="old")},
+            old.prompt_text, old.notes, old.ai_model
+        );
+        INSERT INTO image_fts(rowid, prompt_text, notes, ai_model)
+        VALUES ({_SEARCH_KEY.format(row="new")}, new.prompt_text, new.notes, new.ai_model);
+    END
+    """,
+)
+_BACKFILL_STATEMENTS = (
+    "DELETE FROM image_search_key",
+    "INSERT INTO image_search_key(image_id) SELECT id FROM image",
+    """
+    INSERT INTO image_fts(rowid, prompt_text, notes, ai_model)
+    SELECT image_search_key.key, image.prompt_text, image.notes, image.ai_model
+    FROM image JOIN image_search_key ON image_search_key.image_id = image.id
+    """,
+)
+
+_FTS_TABLE = table("image_fts", column("rowid"), column("image_fts"))
+_KEY_TABLE = table("image_search_key", column("key"), column("image_id"))
+_IMAGE_ID = literal_column("image.id")
+# Trigrams need at least three characters to match anything.
+_MIN_MATCH_LENGTH = 3
+
+
+def ensure_image_fts(connection: Connection) -> None:
+    """Create the FTS table, its key table, and sync triggers.
+
+    Existing rows are indexed once when the table first appears. Tables
+    built with an older layout (tokenizer or rowid keying) are dropped and
+    rebuilt, and the triggers are always recreated so their definitions
+    stay current.
+    """
+    existing = connection.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'image_fts'")
+    ).scalar()
+    for trigger in _FTS_TRIGGERS:
+        connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {trigger}")
+    if existing is not None and _FTS_LAYOUT_MARKER not in existing:
+        connection.exec_driver_sql("DROP TABLE image_fts")
+        existing = None
+    connection.exec_driver_sql(_KEY_TABLE_STATEMENT)
+    connection.exec_driver_sql(_FTS_TABLE_STATEMENT)
+    for statement in _FTS_TRIGGER_STATEMENTS:
+        connection.exec_driver_sql(statement)
+    if existing is None:
+        for statement in _BACKFILL_STATEMENTS:
+            connection.exec_driver_sql(statement)
+
+
+def build_match_query(normalized_q: str) -> str | None:
+    """Translate a lowercased search string into an FTS substring query.
+
+    Returns None when the index cannot reproduce LIKE matching exactly, so
+    callers fall back to LIKE: queries shorter than a trigram, queries with
+    LIKE wildcards, and non-ASCII queries (the tokenizer folds Unicode case,
+    SQLite's lower() only folds ASCII).
+    """
+    if (
+        len(normalized_q) < _MIN_MATCH_LENGTH
+        or not normalized_q.isascii()
+        or "%" in normalized_q
+        or "_" in normalized_q
+    ):
+        return None
+    # Reason: one quoted string is a single trigram phrase, so the whole query
+    # must appear contiguously (words stay ordered) and "and"/"or" or
+    # punctuation are never read as FTS operators.
+    escaped = normalized_q.replace('"', '""')
+    return f'"{escaped}"'
+
+
+def image_matches(match_query: str):
+    """Return a WHERE clause selecting images whose text matches the FTS query."""
+    return _IMAGE_ID.in_(
+        select(_KEY_TABLE.c.image_id)
+        .join(_FTS_TABLE, _FTS_TABLE.c.rowid == _KEY_TABLE.c.key)
+        .where(_FTS_TABLE.c.image_fts.match(match_query))
+    )
@@ -1,13 +1,23 @@
 """Utilities for working with tags."""
 from __future__ import annotations
 
+import time
 from typing import Iterable, List
 
-from sqlalchemy import select
 from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlmodel import Session
 
-from app import models
+from app import models, schemas
+
+# Tag usage is read on every UI render; a short TTL bounds staleness from
+# writers outside this process (e.g. the legacy importer).
+TAG_USAGE_TTL_SECONDS = 5.0
+# One bound parameter per name; stays well under SQLite's variable limit.
+TAG_UPSERT_BATCH_SIZE = 500
+_tag_usage_cache: dict[str, tuple[float, List[schemas.TagUsage]]] = {}
+# Bumped on every invalidation so a read that started before it cannot store
+# the counts it computed from the older state.
+_tag_usage_generations: dict[str, int] = {}
 
 
 def normalize_tag(name: str) -> str:
@@ -25,15 +35,53 @@ def ensure_tags(session: Session, names: Iterable[str]) -> List[models.Tag]:
         if normalized_name:
             normalized.append(normalized_name)
     unique = sorted(set(normalized))
+    if not unique:
+        return []
 
-    tags: List[models.Tag] = []
-    for tag_name in unique:
-        stmt = sqlite_insert(models.Tag).values(name=tag_name).prefix_with("OR IGNORE")
-        session.exec(stmt)
-        tag = session.exec(
-            select(models.Tag).where(models.Tag.name == tag_name)
-        ).scalars().first()
-        if tag is None:
-            continue
-        tags.append(tag)
-    return tags
+    # Reason: the no-op DO UPDATE makes SQLite (3.35+) return existing rows
+    # as well as new ones, so each upsert resolves a whole batch of tags. A
+    # multi-VALUES insert is one statement (insertmanyvalues does not split
+    # it), so large tag lists are chunked here.
+    by_name: dict[str, models.Tag] = {}
+    for start in range(0, len(unique), TAG_UPSERT_BATCH_SIZE):
+        batch = unique[start : start + TAG_UPSERT_BATCH_SIZE]
+        stmt = sqlite_insert(models.Tag).values([{"name": tag_name} for tag_name in batch])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[models.Tag.name], set_={"name": stmt.excluded.name}
+        ).returning(models.Tag)
+        rows = session.exec(
+            stmt, execution_options={"populate_existing": True}
+        ).scalars().all()
+        by_name.update((tag.name, tag) for tag in rows)
+    return [by_name[tag_name] for tag_name in unique]
+
+
+def cached_tag_usage(key: str) -> List[schemas.TagUsage] | None:
+    """Return cached tag usage for a database key if it is still fresh."""
+    entry = _tag_usage_cache.get(key)
+    if entry is None:
+        return None
+    stored_at, usage = entry
+    if time.monotonic() - stored_at >= TAG_USAGE_TTL_SECONDS:
+        _tag_usage_cache.pop(key, None)
+        return None
+    return usage
+
+
+def tag_usage_generation(key: str) -> int:
+    """Return the cache generation to capture before computing tag usage."""
+    return _tag_usage_generations.setdefault(key, 0)
+
+
+def store_tag_usage(key: str, usage: List[schemas.TagUsage], generation: int) -> None:
+    """Remember tag usage for a database key unless it was invalidated meanwhile."""
+    if _tag_usage_generations.get(key) != generation:
+        return
+    _tag_usage_cache[key] = (time.monotonic(), usage)
+
+
+def invalidate_tag_usage() -> None:
+    """Drop cached tag usage after tag links change."""
+    for key in _tag_usage_generations:
+        _tag_usage_generations[key] += 1
+    _tag_usage_cache.clear()
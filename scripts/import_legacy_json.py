@@ -2,31 +2,49 @@
 from __future__ import annotations
 
 import argparse
-import json
 import logging
+import os
 import sys
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+from uuid import uuid4
 
 ROOT_DIR = Path(__file__).resolve().parents[1]
 if str(ROOT_DIR) not in sys.path:
     sys.path.insert(0, str(ROOT_DIR))
 
-from sqlmodel import SQLModel, Session
+from sqlalchemy import insert, update
+from sqlmodel import Session, select
 
 from app import models
-from app.database import engine, session_scope
+from app.database import create_schema, sync_engine
 from app.services import files, tags as tag_service
 from app.prompt_meta import (
     PromptMetaType,
     PromptMetaFormatError,
     validate_prompt_meta_structure,
 )
+from scripts.legacy_json_loader import iter_entries, load_entries  # noqa: F401 re-exported
+from scripts.legacy_media import copy_entry_media, regular_files, resolve_source_file
 
 logger = logging.getLogger(__name__)
 
+# Threads copying media files into the images directory during an import.
+COPY_WORKERS = 8
+# Rows per bulk INSERT; keeps each executemany batch and its tag lookup bounded.
+IMPORT_BATCH_SIZE = 500
+# Per-connection settings for the single import transaction. journal_mode is
+# left alone: it is persistent and shared with the running app (WAL).
+_BULK_IMPORT_PRAGMAS = {
+    "synchronous": "OFF",
+    "temp_store": "MEMORY",
+    "cache_size": "-262144",
+}
+
 
 @dataclass
 class ConvertedEntry:
@@ -57,18 +75,6 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
-def load_entries(path: Path) -> list[dict]:
-    data = json.loads(path.read_text())
-    if not isinstance(data, dict) or "image" not in data:
-        msg = "Legacy JSON must be an object with an 'image' list."
-        raise ValueError(msg)
-    entries = data["image"]
-    if not isinstance(entries, list):
-        msg = "'image' must contain a list of entries."
-        raise ValueError(msg)
-    return entries
-
-
 def parse_datetime(value) -> datetime | None:
     if value is None or isinstance(value, datetime):
         return value
@@ -78,36 +84,58 @@ def parse_datetime(value) -> datetime | None:
         iso_value = value.strip()
         if iso_value.isdigit():
             seconds = int(iso_value)
+            # Digits beyond ten (whole seconds) are sub-second precision: ms, us, ns.
             if len(iso_value) > 10:
-                divisor = 10 ** (len(iso_value) - 10)
-                seconds = seconds / divisor
+                seconds = seconds / 10 ** (len(iso_value) - 10)
             return datetime.fromtimestamp(seconds, tz=timezone.utc)
-        if iso_value.endswith("Z"):
-            iso_value = iso_value[:-1] + "+00:00"
+        # Python 3.11+ parses a trailing "Z" natively, so no string rewrite is needed.
         return datetime.fromisoformat(iso_value)
     raise ValueError("Unsupported datetime value")
 
 
+def _normalize_text_prompt(prompt: str) -> Tuple[str, PromptMetaType, list[dict]]:
+    return prompt, prompt, []
+
+
+def _normalize_list_prompt(prompt: list) -> Tuple[str, PromptMetaType, list[dict]]:
+    validated = validate_prompt_meta_structure(prompt)
+    references = [dict(ref) for ref in validated[:-1] if isinstance(ref, dict)]
+    return validated[-1], validated, references
+
+
+def _normalize_dict_prompt(prompt: dict) -> Tuple[str, PromptMetaType, list[dict]]:
+    # Legacy dictionary metadata may contain additional details without text.
+    return "", prompt, []
+
+
+def _normalize_missing_prompt(prompt: None) -> Tuple[str, PromptMetaType, list[dict]]:
+    return "", None, []
+
+
+_PROMPT_NORMALIZERS = {
+    type(None): _normalize_missing_prompt,
+    str: _normalize_text_prompt,
+    list: _normalize_list_prompt,
+    dict: _normalize_dict_prompt,
+}
+
+
 def normalize_prompt(prompt) -> Tuple[str, PromptMetaType, list[dict]]:
-    if prompt is None:
-        return "", None, []
-    if isinstance(prompt, str):
-        return prompt, prompt, []
-    if isinstance(prompt, list):
-        validated = validate_prompt_meta_structure(prompt)
-        references = [
-            dict(ref) for ref in validated[:-1] if isinstance(ref, dict)
-        ]
-        return validated[-1], validated, references
-    if isinstance(prompt, dict):
-        # Legacy dictionary metadata may contain additional details without text.
-        return "", prompt, []
-    raise PromptMetaFormatError("Unsupported prompt metadata structure")
+    # Reason: parsed JSON only produces these exact types, so one dict lookup
+    # on type() replaces the isinstance chain; subclasses use the slow path.
+    normalizer = _PROMPT_NORMALIZERS.get(type(prompt))
+    if normalizer is None:
+        for kind in (str, list, dict):
+            if isinstance(prompt, kind):
+                normalizer = _PROMPT_NORMALIZERS[kind]
+                break
+        else:
+            raise PromptMetaFormatError("Unsupported prompt metadata structure")
+    return normalizer(prompt)
 
 
 def detect_media_type(file_name: str) -> models.MediaType:
-    suffix = Path(file_name).suffix.lower()
-    if suffix in {".mp4", ".mov", ".webm", ".mkv"}:
+    if os.path.splitext(file_name)[1].lower() in files.VIDEO_EXTENSIONS:
         return models.MediaType.VIDEO
     return models.MediaType.IMAGE
 
@@ -132,7 +160,10 @@ def normalize_rating(raw_rating) -> float | None:
 
 def convert_entry(entry: dict) -> ConvertedEntry:
     prompt_text, prompt_meta, references = normalize_prompt(entry.get("prompt"))
-    tags = sorted({tag.strip().lower() for tag in entry.get("tags", []) if tag.strip()})
+    # Order-preserving dedup with one strip per tag; ensure_tags sorts on its own.
+    tags = list(
+        dict.fromkeys(name for tag in entry.get("tags", ()) if (name := tag.strip().lower()))
+    )
     sanitized_name = files.sanitize_storage_name(entry["file"])
     legacy_media_type = entry.get("media_type")
     media_type = (
@@ -172,72 +203,166 @@ def convert_entry(entry: dict) -> ConvertedEntry:
     )
 
 
-def _resolve_source_file(base_dir: Path, relative_name: str) -> Path:
-    candidate = (base_dir / relative_name).resolve()
-    base_dir_resolved = base_dir.resolve()
-    try:
-        candidate.relative_to(base_dir_resolved)
-    except ValueError as exc:
-        raise ValueError(f"Legacy image path {relative_name} escapes base directory") from exc
-    if not candidate.is_file():
-        raise FileNotFoundError(f"Legacy image {relative_name} not found in {base_dir_resolved}")
-    return candidate
+def _insert_batch(
+    session: Session,
+    batch: list[tuple[dict, ConvertedEntry]],
+    tag_ids: dict[str, int],
+) -> None:
+    """Insert a batch of converted images and their tag links in bulk.
+
+    ``tag_ids`` maps known tag names to ids and is extended with new tags.
+    """
+    if not batch:
+        return
+    missing = {name for _, converted in batch for name in converted.tags} - tag_ids.keys()
+    if missing:
+        tag_ids.update(
+            (tag.name, tag.id) for tag in tag_service.ensure_tags(session, missing)
+        )
+    now = models.utc_now()
+    session.exec(
+        insert(models.Image),
+        params=[{**payload, "created_at": now, "updated_at": now} for payload, _ in batch],
+    )
+    link_rows = [
+        {"image_id": payload["id"], "tag_id": tag_ids[name]}
+        for payload, converted in batch
+        for name in converted.tags
+    ]
+    if link_rows:
+        session.exec(insert(models.ImageTagLink), params=link_rows)
+
+
+@contextmanager
+def _bulk_import_session() -> Iterator[Session]:
+    """Yield a session on a dedicated connection tuned for bulk loading.
+
+    The previous pragma values are restored before the connection returns to
+    the pool, even if the import fails.
+    """
+    with sync_engine.connect() as connection:
+        previous = {
+            name: connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+            for name in _BULK_IMPORT_PRAGMAS
+        }
+        # Reason: SQLite refuses to change synchronous inside a transaction, so
+        # pragmas are applied (and restored) while no import transaction is open.
+        _set_pragmas(connection, _BULK_IMPORT_PRAGMAS)
+        try:
+            with Session(bind=connection, expire_on_commit=False) as session:
+                yield session
+        finally:
+            connection.rollback()
+            _set_pragmas(connection, previous)
+
+
+def _set_pragmas(connection, values: Dict[str, Any]) -> None:
+    for name, value in values.items():
+        connection.exec_driver_sql(f"PRAGMA {name}={value}")
+    connection.commit()
+
+
+def _flush_pending(
+    session: Session,
+    pending: list[tuple[Future[dict], ConvertedEntry]],
+    tag_ids: dict[str, int],
+    imported_records: list[ImportedRecord],
+    legacy_lookup: dict[str, dict[str, str | None]],
+) -> None:
+    """Wait for a batch of media copies, then record and insert the batch."""
+    batch = [(future.result(), converted) for future, converted in pending]
+    pending.clear()
+    for payload, converted in batch:
+        imported_records.append(
+            ImportedRecord(
+                image_id=payload["id"],
+                legacy_id=converted.legacy_id,
+                reference_dicts=converted.reference_dicts,
+                has_explicit_thumbnail=bool(payload["thumbnail_file"]),
+                media_type=payload["media_type"],
+            )
+        )
+        if converted.legacy_id:
+            legacy_lookup[converted.legacy_id] = {
+                "id": payload["id"],
+                "file_name": payload["file_name"],
+                "thumbnail_file": payload["thumbnail_file"],
+            }
+    _insert_batch(session, batch, tag_ids)
 
 
-def import_entries(entries: list[dict], source_dir: Path, dry_run: bool = False) -> None:
+def import_entries(
+    entries: Iterable[dict], source_dir: Path, dry_run: bool = False
+) -> None:
     imported_records: list[ImportedRecord] = []
     legacy_lookup: dict[str, dict[str, str | None]] = {}
-
-    with session_scope() as session:
-        for entry in entries:
-            converted = convert_entry(entry)
-            try:
-                source_file = _resolve_source_file(source_dir, entry["file"])
-            except (FileNotFoundError, ValueError) as exc:
-                logger.error("Skipping %s: %s", entry.get("file"), exc)
-                raise
-
-            suffix = source_file.suffix.lower()
-            if suffix not in files.ALLOWED_EXTENSIONS:
-                raise ValueError(f"Unsupported legacy file extension: {suffix}")
-
-            payload = dict(converted.payload)
-            if not dry_run:
-                copied_name = files.copy_into_images(source_file, payload["file_name"])
-                payload["file_name"] = copied_name
-                if payload.get("thumbnail_file") and converted.thumbnail_source:
-                    thumb_source = _resolve_source_file(source_dir, converted.thumbnail_source)
-                    copied_thumb = files.copy_into_images(thumb_source, payload["thumbnail_file"])
-                    payload["thumbnail_file"] = copied_thumb
-
-            tag_instances = tag_service.ensure_tags(session, converted.tags)
-            image = models.Image(**payload, tags=tag_instances)
-            session.add(image)
-            session.flush()
-            session.refresh(image)
-
-            imported_records.append(
-                ImportedRecord(
-                    image_id=image.id,
-                    legacy_id=converted.legacy_id,
-                    reference_dicts=converted.reference_dicts,
-                    has_explicit_thumbnail=bool(image.thumbnail_file),
-                    media_type=image.media_type,
+    pending: list[tuple[Future[dict], ConvertedEntry]] = []
+    # Resolved once; every entry's path is checked against it.
+    base_dir_resolved = source_dir.resolve()
+    # One directory read instead of a stat per referenced file.
+    known_files = regular_files(base_dir_resolved)
+    allowed_extensions = files.ALLOWED_EXTENSIONS
+    copied: list[str] = []
+
+    # Reason: file copies are I/O bound, so worker threads copy one batch of
+    # media while the main thread keeps converting entries; SQLite writes
+    # stay on the main thread.
+    executor = ThreadPoolExecutor(max_workers=COPY_WORKERS)
+    try:
+        with _bulk_import_session() as session:
+            # Reason: legacy exports reuse a small tag vocabulary, so loading it
+            # once lets most batches skip the tag round-trips entirely.
+            tag_ids = dict(session.exec(select(models.Tag.name, models.Tag.id)).all())
+            for entry in entries:
+                converted = convert_entry(entry)
+                try:
+                    source_file = resolve_source_file(
+                        base_dir_resolved, entry["file"], known_files
+                    )
+                except (FileNotFoundError, ValueError) as exc:
+                    logger.error("Skipping %s: %s", entry.get("file"), exc)
+                    raise
+
+                suffix = source_file.suffix.lower()
+                if suffix not in allowed_extensions:
+                    raise ValueError(f"Unsupported legacy file extension: {suffix}")
+
+                # Reason: ids are generated up front so rows can be bulk inserted
+                # without flushing and refreshing each ORM instance.
+                payload = {**converted.payload, "id": str(uuid4())}
+                future = executor.submit(
+                    copy_entry_media,
+                    base_dir_resolved,
+                    known_files,
+                    source_file,
+                    payload,
+                    converted.thumbnail_source,
+                    dry_run,
+                    copied,
                 )
-            )
-            if converted.legacy_id:
-                legacy_lookup[converted.legacy_id] = {
-                    "id": image.id,
-                    "file_name": image.file_name,
-                    "thumbnail_file": image.thumbnail_file,
-                }
-
-        _apply_reference_updates(session, imported_records, legacy_lookup)
-
-        if dry_run:
-            session.rollback()
-        else:
-            session.commit()
+                pending.append((future, converted))
+                if len(pending) >= IMPORT_BATCH_SIZE:
+                    _flush_pending(
+                        session, pending, tag_ids, imported_records, legacy_lookup
+                    )
+
+            _flush_pending(session, pending, tag_ids, imported_records, legacy_lookup)
+
+            _apply_reference_updates(session, imported_records, legacy_lookup)
+            _require_video_thumbnails(session, imported_records)
+
+            if dry_run:
+                session.rollback()
+            else:
+                session.commit()
+    except BaseException:
+        # Queued copies are dropped; running ones finish before the cleanup so
+        # every file already written is known and removed with the rollback.
+        executor.shutdown(cancel_futures=True)
+        files.delete_media_files(*copied)
+        raise
+    finally:
+        executor.shutdown(cancel_futures=True)
 
 
 def _apply_reference_updates(
@@ -245,10 +370,22 @@ def _apply_reference_updates(
     records: list[ImportedRecord],
     legacy_lookup: dict[str, dict[str, str | None]],
 ) -> None:
-    for record in records:
-        if not record.reference_dicts:
-            continue
-        image = session.get(models.Image, record.image_id)
+    candidates = [record for record in records if record.reference_dicts]
+    if not candidates:
+        return
+    # Reason: one SELECT per chunk and a single executemany UPDATE replace a
+    # get() plus an ORM flush per referencing image.
+    ids = [record.image_id for record in candidates]
+    current = {}
+    for start in range(0, len(ids), IMPORT_BATCH_SIZE):
+        stmt = select(models.Image.id, models.Image.prompt_text, models.Image.file_name).where(
+            models.Image.id.in_(ids[start : start + IMPORT_BATCH_SIZE])
+        )
+        current.update((row.id, row) for row in session.exec(stmt))
+
+    update_rows: list[dict[str, Any]] = []
+    for record in candidates:
+        image = current.get(record.image_id)
         if image is None:
             continue
 
@@ -270,23 +407,58 @@ def _apply_reference_updates(
         if not updated_refs:
             continue
 
-        image.prompt_meta = [*updated_refs, image.prompt_text]
+        values: dict[str, Any] = {
+            "id": record.image_id,
+            "prompt_meta": [*updated_refs, image.prompt_text],
+        }
         if not record.has_explicit_thumbnail and first_source:
             replacement = first_source.get("thumbnail_file") or first_source.get("file_name")
-            image.thumbnail_file = replacement
+            values["thumbnail_file"] = replacement
             if record.legacy_id and replacement:
                 legacy_lookup.setdefault(
                     record.legacy_id,
                     {"id": record.image_id, "file_name": image.file_name, "thumbnail_file": None},
                 )["thumbnail_file"] = replacement
-        session.add(image)
+        update_rows.append(values)
+
+    if update_rows:
+        session.exec(update(models.Image), params=update_rows)
+
+
+def _require_video_thumbnails(session: Session, records: list[ImportedRecord]) -> None:
+    """Fail the import if a video was left without a thumbnail.
+
+    The bulk inserts bypass ImageValidator, so this enforces its video rule
+    once references (and inherited thumbnails) have been resolved.
+    """
+    ids = [
+        record.image_id
+        for record in records
+        if record.media_type == models.MediaType.VIDEO and not record.has_explicit_thumbnail
+    ]
+    missing: list[str] = []
+    for start in range(0, len(ids), IMPORT_BATCH_SIZE):
+        stmt = select(models.Image.file_name).where(
+            models.Image.id.in_(ids[start : start + IMPORT_BATCH_SIZE]),
+            models.Image.thumbnail_file.is_(None),
+        )
+        missing.extend(session.exec(stmt))
+    if missing:
+        raise ValueError(
+            "Video entries have no thumbnail after resolving references: "
+            + ", ".join(sorted(missing))
+        )
 
 
 def main() -> None:
     args = parse_args()
-    entries = load_entries(args.json_path)
-    SQLModel.metadata.create_all(engine)
-    import_entries(entries, source_dir=args.json_path.parent, dry_run=args.dry_run)
+    with sync_engine.begin() as connection:
+        create_schema(connection)
+    import_entries(
+        iter_entries(args.json_path),
+        source_dir=args.json_path.parent,
+        dry_run=args.dry_run,
+    )
 
 
 if __name__ == "__main__":
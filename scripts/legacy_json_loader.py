@@ -0,0 +1,123 @@
+"""Load entries from legacy JSON exports."""
+from __future__ import annotations
+
+import json
+import re
+from pathlib import Path
+from typing import Any, Iterator, TextIO
+
+from app import json_codec
+
+# Exports above this size are streamed entry by entry instead of parsed whole.
+STREAM_THRESHOLD_BYTES = 100 * 1024 * 1024
+_READ_SIZE = 1 << 20
+
+_SHAPE_ERROR = "Legacy JSON must be an object with an 'image' list."
+_ENTRIES_ERROR = "'image' must contain a list of entries."
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def iter_entries(path: Path) -> Iterator[dict]:
+    """Yield legacy entries, streaming exports too large to parse at once."""
+    if path.stat().st_size > STREAM_THRESHOLD_BYTES:
+        yield from _stream_entries(path)
+        return
+    # Reason: orjson parses the raw bytes in one pass when the export fits
+    # comfortably in memory; json_codec keeps stdlib results for wide
+    # integers and NaN/Infinity so both paths import the same values.
+    data = json_codec.loads(path.read_bytes())
+    if not isinstance(data, dict) or "image" not in data:
+        raise ValueError(_SHAPE_ERROR)
+    entries = data["image"]
+    if not isinstance(entries, list):
+        raise ValueError(_ENTRIES_ERROR)
+    yield from entries
+
+
+class _JSONStream:
+    """Decode one JSON value at a time from a text file with the stdlib scanner."""
+
+    def __init__(self, handle: TextIO) -> None:
+        self._handle = handle
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> None:
+        # Reason: reading at least as much as is already buffered doubles the
+        # window, so re-decoding a value that spans many reads stays linear.
+        pending = self._buffer[self._pos :]
+        chunk = self._handle.read(max(_READ_SIZE, len(pending)))
+        self._eof = not chunk
+        self._buffer = pending + chunk
+        self._pos = 0
+
+    def next_char(self) -> str:
+        """Skip whitespace and consume the next structural character."""
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer) or self._eof:
+                break
+            self._fill()
+        char = self._buffer[self._pos : self._pos + 1]
+        self._pos += len(char)
+        return char
+
+    def peek_char(self) -> str:
+        char = self.next_char()
+        self._pos -= len(char)
+        return char
+
+    def value(self) -> Any:
+        """Decode the next complete value, reading more text until it ends."""
+        self.peek_char()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+                self._fill()
+                continue
+            # A number touching the end of the buffer may continue in the file.
+            if end < len(self._buffer) or self._eof:
+                self._pos = end
+                return value
+            self._fill()
+
+
+def _stream_entries(path: Path) -> Iterator[dict]:
+    with path.open(encoding="utf-8") as handle:
+        stream = _JSONStream(handle)
+        if stream.next_char() != "{":
+            raise ValueError(_SHAPE_ERROR)
+        separator = "," if stream.peek_char() != "}" else "}"
+        while separator == ",":
+            key = stream.value()
+            if stream.next_char() != ":":
+                raise ValueError(_SHAPE_ERROR)
+            if key == "image":
+                yield from _stream_list(stream)
+                return
+            stream.value()
+            separator = stream.next_char()
+    raise ValueError(_SHAPE_ERROR)
+
+
+def _stream_list(stream: _JSONStream) -> Iterator[Any]:
+    if stream.next_char() != "[":
+        raise ValueError(_ENTRIES_ERROR)
+    if stream.peek_char() == "]":
+        return
+    while True:
+        yield stream.value()
+        separator = stream.next_char()
+        if separator == "]":
+            return
+        if separator != ",":
+            raise ValueError(_ENTRIES_ERROR)
+
+
+def load_entries(path: Path) -> list[dict]:
+    return list(iter_entries(path))
@@ -0,0 +1,61 @@
+"""Locate legacy media files and copy them into the images directory."""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Collection
+
+from app.services import files
+
+
+def regular_files(directory: Path) -> frozenset[str]:
+    """Return the names of regular (non-symlink) files directly in ``directory``."""
+    with os.scandir(directory) as entries:
+        return frozenset(entry.name for entry in entries if entry.is_file(follow_symlinks=False))
+
+
+def resolve_source_file(
+    base_dir_resolved: Path, relative_name: str, known_files: Collection[str] = frozenset()
+) -> Path:
+    """Resolve a legacy file under an already-resolved export directory.
+
+    ``known_files`` lists bare names known to be regular files in the
+    directory (see ``regular_files``); those skip the filesystem entirely.
+    """
+    # Reason: a regular file directly in the directory cannot escape it, so a
+    # set lookup replaces resolving every path component and the final stat.
+    if relative_name in known_files:
+        return base_dir_resolved / relative_name
+    candidate = (base_dir_resolved / relative_name).resolve()
+    try:
+        candidate.relative_to(base_dir_resolved)
+    except ValueError as exc:
+        raise ValueError(f"Legacy image path {relative_name} escapes base directory") from exc
+    if not candidate.is_file():
+        raise FileNotFoundError(f"Legacy image {relative_name} not found in {base_dir_resolved}")
+    return candidate
+
+
+def copy_entry_media(
+    base_dir_resolved: Path,
+    known_files: Collection[str],
+    source_file: Path,
+    payload: dict,
+    thumbnail_source: str | None,
+    dry_run: bool,
+    copied: list[str],
+) -> dict:
+    """Copy an entry's media (and thumbnail) into the images directory.
+
+    Each stored name is appended to ``copied`` as soon as it is written, so a
+    failed import can remove everything it already copied.
+    """
+    if dry_run:
+        return payload
+    payload["file_name"] = files.copy_into_images(source_file, payload["file_name"])
+    copied.append(payload["file_name"])
+    if payload.get("thumbnail_file") and thumbnail_source:
+        thumb_source = resolve_source_file(base_dir_resolved, thumbnail_source, known_files)
+        payload["thumbnail_file"] = files.copy_into_images(thumb_source, payload["thumbnail_file"])
+        copied.append(payload["thumbnail_file"])
+    return payload
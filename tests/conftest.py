@@ -1,55 +1,129 @@
 """Shared pytest fixtures."""
 from __future__ import annotations
 
+import shutil
 from pathlib import Path
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy.orm import sessionmaker
-from sqlmodel import Session, SQLModel, create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool, StaticPool
+from sqlmodel import Session, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.config import settings
-from app.database import get_session
+from app.database import create_schema, enable_sqlite_pragmas, get_session
 from app import database
 from app.main import app
 import app.main as app_main
 
 
 @pytest.fixture()
-def api_client(tmp_path: Path):
+def anyio_backend() -> str:
+    """Run async tests on asyncio, matching the production event loop."""
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+def model_engine():
+    """One in-memory database with the schema created once for model tests."""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+
+    # Reason: pysqlite defers BEGIN until the first write, which breaks the
+    # SAVEPOINTs the per-test session relies on; emit BEGIN explicitly.
+    @event.listens_for(engine, "connect")
+    def _disable_pysqlite_begin(dbapi_connection, _):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _emit_begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture()
+def model_session(model_engine):
+    """Yield a session whose commits are rolled back when the test ends."""
+    connection = model_engine.connect()
+    transaction = connection.begin()
+    with Session(
+        bind=connection, join_transaction_mode="create_savepoint", expire_on_commit=False
+    ) as db_session:
+        yield db_session
+    transaction.rollback()
+    connection.close()
+
+
+@pytest.fixture(scope="session")
+def schema_template(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """Build the application schema once into a template database file."""
+    template_path = tmp_path_factory.mktemp("schema") / "template.db"
+    # Reason: the template stays in rollback-journal mode so the single file
+    # holds the whole schema and can be copied without a WAL checkpoint.
+    engine = create_engine(f"sqlite:///{template_path}")
+    with engine.begin() as connection:
+        create_schema(connection)
+    engine.dispose()
+    return template_path
+
+
+@pytest.fixture(scope="session")
+def shared_client(schema_template: Path):
+    """Start the app's TestClient (and its event loop) once per test session."""
+    # Reason: startup only runs create_schema, which is a no-op on the
+    # template; each test then points the app at its own copy.
+    startup_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{schema_template}", poolclass=NullPool
+    )
+    original_main_engine = app_main.engine
+    app_main.engine = startup_engine
+    with TestClient(app) as client:
+        yield client
+    app_main.engine = original_main_engine
+
+
+@pytest.fixture()
+def api_client(tmp_path: Path, schema_template: Path, shared_client: TestClient):
     """Provide a TestClient backed by a temporary SQLite database."""
     db_path = tmp_path / "test.db"
+    # Reason: copying the prebuilt file is far cheaper than replaying the DDL.
+    shutil.copyfile(schema_template, db_path)
     images_dir = tmp_path / "images"
     images_dir.mkdir()
 
-    engine = create_engine(
-        f"sqlite:///{db_path}",
+    # Reason: NullPool closes connections with each session, so nothing stays
+    # open on this test's database file once the test ends.
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{db_path}",
         connect_args={"check_same_thread": False},
+        poolclass=NullPool,
     )
-    SQLModel.metadata.create_all(engine)
-    SessionLocal = sessionmaker(bind=engine, class_=Session, expire_on_commit=False)
+    enable_sqlite_pragmas(engine.sync_engine)
+    SessionLocal = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
 
     original_engine = database.engine
     original_session_local = database.SessionLocal
     original_images_dir = settings.images_dir
-    original_main_engine = app_main.engine
 
     database.engine = engine
     database.SessionLocal = SessionLocal
     settings.images_dir = images_dir
-    app_main.engine = engine
 
-    def override_get_session():
-        with SessionLocal() as session:
+    async def override_get_session():
+        async with SessionLocal() as session:
             yield session
 
     app.dependency_overrides[get_session] = override_get_session
 
-    with TestClient(app) as client:
-        yield client
+    yield shared_client
 
     app.dependency_overrides.pop(get_session, None)
     database.engine = original_engine
     database.SessionLocal = original_session_local
     settings.images_dir = original_images_dir
-    app_main.engine = original_main_engine
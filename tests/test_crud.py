@@ -1,14 +1,19 @@
 """CRUD-layer tests for images and tags."""
 from __future__ import annotations
 
+import sqlite3
 from datetime import datetime, timedelta, timezone
 
 import pytest
 from fastapi import HTTPException
 from pydantic import ValidationError
-from sqlmodel import Session, SQLModel, create_engine
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app import models, schemas
+from app.database import create_schema
 from app.crud import (
     ImageFilters,
     create_image,
@@ -17,28 +22,65 @@ from app.crud import (
     list_images,
     update_image,
 )
+from app.services import tags as tag_service
 from app.services.tags import ensure_tags
 
 
+pytestmark = pytest.mark.anyio
+
+
 @pytest.fixture()
-def session():
-    engine = create_engine("sqlite://", connect_args={"check_same_thread": False})
-    SQLModel.metadata.create_all(engine)
-    with Session(engine) as session:
+async def session():
+    engine = create_async_engine("sqlite+aiosqlite://", connect_args={"check_same_thread": False})
+    async with engine.begin() as connection:
+        await connection.run_sync(create_schema)
+    async with AsyncSession(engine, expire_on_commit=False) as session:
         yield session
+    await engine.dispose()
 
 
-def test_ensure_tags_normalizes_and_reuses(session):
-    tags = ensure_tags(session, ["SciFi", "scifi", "  ", "SPACE"])
+async def test_ensure_tags_normalizes_and_reuses(session):
+    tags = await session.run_sync(ensure_tags, ["SciFi", "scifi", "  ", "SPACE"])
     assert [t.name for t in tags] == ["scifi", "space"]
 
-    reused = ensure_tags(session, ["SCIFI"])
+    reused = await session.run_sync(ensure_tags, ["SCIFI"])
     assert reused[0].id == tags[0].id
 
 
-def test_create_and_list_images_with_filters(session):
+async def test_ensure_tags_mixes_existing_and_new_names(session):
+    (existing,) = await session.run_sync(ensure_tags, ["space"])
+
+    tags = await session.run_sync(ensure_tags, ["Zeta", "space", "alpha"])
+
+    assert [t.name for t in tags] == ["alpha", "space", "zeta"]
+    assert tags[1].id == existing.id
+    assert await session.run_sync(ensure_tags, []) == []
+
+
+def test_ensure_tags_upserts_more_names_than_the_variable_limit(monkeypatch):
+    engine = create_engine("sqlite://")
+
+    @event.listens_for(engine, "connect")
+    def _limit_variables(dbapi_connection, _record):
+        dbapi_connection.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 100)
+
+    monkeypatch.setattr(tag_service, "TAG_UPSERT_BATCH_SIZE", 40)
+    with engine.begin() as connection:
+        create_schema(connection)
+    names = [f"tag-{index:03d}" for index in range(250)]
+
+    with Session(engine) as sync_session:
+        (existing,) = ensure_tags(sync_session, ["tag-010"])
+        tags = ensure_tags(sync_session, names)
+
+    assert [t.name for t in tags] == names
+    assert tags[10].id == existing.id
+    assert len({t.id for t in tags}) == len(names)
+
+
+async def test_create_and_list_images_with_filters(session):
     base_time = datetime.now(tz=timezone.utc)
-    create_image(
+    await create_image(
         session,
         schemas.ImageCreate(
             file_name="mars.png",
@@ -48,7 +90,7 @@ def test_create_and_list_images_with_filters(session):
             captured_at=base_time,
         ),
     )
-    create_image(
+    await create_image(
         session,
         schemas.ImageCreate(
             file_name="forest.png",
@@ -60,15 +102,15 @@ def test_create_and_list_images_with_filters(session):
     )
 
     filters = ImageFilters(q="space", tags=["scifi"], rating_min=4, limit=10)
-    items, total = list_images(session, filters)
+    items, total = await list_images(session, filters)
 
     assert total == 1
     assert len(items) == 1
     assert {t.name for t in items[0].tags} == {"scifi", "space"}
 
 
-def test_update_image_replaces_metadata_and_tags(session):
-    created = create_image(
+async def test_update_image_replaces_metadata_and_tags(session):
+    created = await create_image(
         session,
         schemas.ImageCreate(
             file_name="edit.png",
@@ -79,7 +121,7 @@ def test_update_image_replaces_metadata_and_tags(session):
     )
     original_updated = created.updated_at
 
-    updated = update_image(
+    updated = await update_image(
         session,
         created.id,
         schemas.ImageUpdate(
@@ -95,21 +137,21 @@ def test_update_image_replaces_metadata_and_tags(session):
     assert updated.updated_at > original_updated
 
 
-def test_delete_image_removes_record(session):
-    created = create_image(
+async def test_delete_image_removes_record(session):
+    created = await create_image(
         session,
         schemas.ImageCreate(file_name="delete.png", prompt_text="will go away"),
     )
 
-    delete_image(session, created.id)
+    await delete_image(session, created.id)
 
     with pytest.raises(HTTPException):
-        get_image(session, created.id)
+        await get_image(session, created.id)
 
 
-def test_create_image_persists_prompt_references(session):
+async def test_create_image_persists_prompt_references(session):
     prompt_meta = [{"id": "seed-1"}, "final prompt"]
-    created = create_image(
+    created = await create_image(
         session,
         schemas.ImageCreate(
             file_name="prompt.png",
@@ -122,9 +164,9 @@ def test_create_image_persists_prompt_references(session):
     assert created.prompt_meta == prompt_meta
 
 
-def test_list_images_supports_decimal_rating_filters(session):
+async def test_list_images_supports_decimal_rating_filters(session):
     base_time = datetime.now(tz=timezone.utc)
-    create_image(
+    await create_image(
         session,
         schemas.ImageCreate(
             file_name="high.png",
@@ -133,7 +175,7 @@ def test_list_images_supports_decimal_rating_filters(session):
             captured_at=base_time,
         ),
     )
-    create_image(
+    await create_image(
         session,
         schemas.ImageCreate(
             file_name="low.png",
@@ -144,15 +186,28 @@ def test_list_images_supports_decimal_rating_filters(session):
     )
 
     filters = ImageFilters(rating_min=4.0, rating_max=4.3, limit=10)
-    items, total = list_images(session, filters)
+    items, total = await list_images(session, filters)
 
     assert total == 1
     assert items[0].file_name == "high.png"
 
 
-def test_create_video_requires_thumbnail(session):
+def test_image_schemas_keep_prompt_meta_as_given_and_reject_bad_shapes():
+    prompt_meta = [{"id": "abc", "weight": 0.5}, "final prompt"]
+
+    created = schemas.ImageCreate(file_name="a.png", prompt_text="p", prompt_meta=prompt_meta)
+    assert created.prompt_meta == prompt_meta
+    assert schemas.ImageUpdate(prompt_meta={"seed": 1}).prompt_meta == {"seed": 1}
+
+    with pytest.raises(ValidationError):
+        schemas.ImageUpdate(prompt_meta=42)
+    with pytest.raises(ValidationError):
+        schemas.ImageCreate(file_name="a.png", prompt_text="p", prompt_meta=[{"id": "abc"}])
+
+
+async def test_create_video_requires_thumbnail(session):
     with pytest.raises(ValidationError):
-        create_image(
+        await create_image(
             session,
             schemas.ImageCreate(
                 file_name="clip.mp4",
@@ -162,7 +217,7 @@ def test_create_video_requires_thumbnail(session):
         )
 
 
-def test_delete_image_removes_primary_and_thumbnail_files(session, monkeypatch):
+async def test_delete_image_removes_primary_and_thumbnail_files(session, monkeypatch):
     deleted_files: list[str] = []
 
     def fake_delete(name: str | None) -> None:
@@ -171,7 +226,7 @@ def test_delete_image_removes_primary_and_thumbnail_files(session, monkeypatch):
 
     monkeypatch.setattr("app.services.files.delete_file", fake_delete)
 
-    created = create_image(
+    created = await create_image(
         session,
         schemas.ImageCreate(
             file_name="clip.mp4",
@@ -181,7 +236,136 @@ def test_delete_image_removes_primary_and_thumbnail_files(session, monkeypatch):
         ),
     )
 
-    delete_image(session, created.id)
+    await delete_image(session, created.id)
 
     assert created.file_name in deleted_files
     assert created.thumbnail_file in deleted_files
+
+
+async def test_list_images_reports_total_across_pages(session):
+    for index in range(3):
+        await create_image(
+            session,
+            schemas.ImageCreate(file_name=f"page-{index}.png", prompt_text=f"Page {index}"),
+        )
+
+    items, total = await list_images(session, ImageFilters(limit=2, offset=2))
+    assert total == 3
+    assert len(items) == 1
+
+    items, total = await list_images(session, ImageFilters(limit=2, offset=10))
+    assert total == 3
+    assert items == []
+
+
+async def test_list_images_tag_filter_requires_every_tag(session):
+    both = await create_image(
+        session,
+        schemas.ImageCreate(file_name="both.png", prompt_text="Both", tags=["space", "scifi"]),
+    )
+    await create_image(
+        session,
+        schemas.ImageCreate(file_name="space.png", prompt_text="Space only", tags=["space"]),
+    )
+
+    items, total = await list_images(session, ImageFilters(tags=["SPACE", "scifi"]))
+    assert total == 1
+    assert items[0].id == both.id
+
+    items, total = await list_images(session, ImageFilters(tags=["space", "missing"]))
+    assert total == 0
+    assert items == []
+
+
+async def test_list_images_tag_filter_ignores_duplicate_and_blank_tags(session):
+    await create_image(
+        session,
+        schemas.ImageCreate(file_name="space.png", prompt_text="Space", tags=["space"]),
+    )
+
+    items, total = await list_images(session, ImageFilters(tags=[" Space ", "space", "", "  "]))
+    assert total == 1
+    assert items[0].file_name == "space.png"
+
+
+async def test_list_images_tag_filter_handles_many_tags(session):
+    many_tags = [f"tag-{index}" for index in range(10)]
+    tagged = await create_image(
+        session,
+        schemas.ImageCreate(file_name="many.png", prompt_text="Many", tags=many_tags),
+    )
+    await create_image(
+        session,
+        schemas.ImageCreate(file_name="few.png", prompt_text="Few", tags=many_tags[:9]),
+    )
+
+    items, total = await list_images(session, ImageFilters(tags=many_tags))
+    assert total == 1
+    assert items[0].id == tagged.id
+
+
+async def test_update_image_with_empty_tags_clears_links(session):
+    created = await create_image(
+        session,
+        schemas.ImageCreate(file_name="clear.png", prompt_text="Clear tags", tags=["a", "b"]),
+    )
+
+    updated = await update_image(session, created.id, schemas.ImageUpdate(tags=[]))
+
+    assert updated.tags == []
+    items, total = await list_images(session, ImageFilters(tags=["a"]))
+    assert total == 0
+
+
+async def test_list_images_text_search_tracks_updates_and_deletes(session):
+    created = await create_image(
+        session,
+        schemas.ImageCreate(file_name="search.png", prompt_text="Spaceship over Mars"),
+    )
+
+    items, total = await list_images(session, ImageFilters(q="SHIP over mars"))
+    assert total == 1
+    assert items[0].id == created.id
+
+    await update_image(session, created.id, schemas.ImageUpdate(notes="nebula backdrop"))
+    _, total = await list_images(session, ImageFilters(q="nebula"))
+    assert total == 1
+
+    await delete_image(session, created.id)
+    _, total = await list_images(session, ImageFilters(q="spaceship"))
+    assert total == 0
+
+
+async def test_list_images_text_search_matches_infixes_and_phrases(session):
+    created = await create_image(
+        session,
+        schemas.ImageCreate(
+            file_name="infix.png",
+            prompt_text="Spaceship launching from Mars",
+            ai_model="midjourney-v6",
+        ),
+    )
+
+    for query in ("ship", "journey", "launching from", "ey-v", "Sp"):
+        items, total = await list_images(session, ImageFilters(q=query))
+        assert total == 1, query
+        assert items[0].id == created.id
+
+    # Multi-word queries are phrases: reordered words no longer match.
+    _, total = await list_images(session, ImageFilters(q="from launching"))
+    assert total == 0
+
+
+async def test_list_images_text_search_falls_back_to_like_for_punctuation(session):
+    await create_image(
+        session,
+        schemas.ImageCreate(
+            file_name="punct.png", prompt_text="Retro", ai_model="sd-xl:v2"
+        ),
+    )
+
+    _, total = await list_images(session, ImageFilters(q="xl:v2"))
+    assert total == 1
+
+    _, total = await list_images(session, ImageFilters(q='"unterminated'))
+    assert total == 0
@@ -0,0 +1,179 @@
+"""Database schema helper tests."""
+from __future__ import annotations
+
+import json
+
+from sqlalchemy import inspect, text
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app import database, models  # noqa: F401 ensures models registered
+from app.config import settings
+from app.database import create_schema, enable_sqlite_pragmas
+from app.services import search
+
+
+def _index_names(connection, table_name: str) -> set[str]:
+    return {index["name"] for index in inspect(connection).get_indexes(table_name)}
+
+
+def test_create_schema_builds_tables_and_list_indexes() -> None:
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        create_schema(connection)
+
+        assert {"ix_image_sort", "ix_image_captured_created", "ix_image_rating"} <= _index_names(
+            connection, "image"
+        )
+        assert "ix_imagetag_tagid_imageid" in _index_names(connection, "imagetaglink")
+
+
+def test_create_schema_backfills_indexes_on_existing_database() -> None:
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        SQLModel.metadata.create_all(connection)
+        connection.execute(text("DROP INDEX ix_image_sort"))
+        connection.execute(text("DROP INDEX ix_image_rating"))
+
+        create_schema(connection)
+
+        assert {"ix_image_sort", "ix_image_captured_created", "ix_image_rating"} <= _index_names(
+            connection, "image"
+        )
+
+
+def test_create_schema_is_idempotent() -> None:
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        create_schema(connection)
+        create_schema(connection)
+
+        assert "ix_image_sort" in _index_names(connection, "image")
+
+
+def test_enable_sqlite_pragmas_switches_file_database_to_wal(tmp_path) -> None:
+    engine = create_engine(f"sqlite:///{tmp_path / 'wal.db'}")
+    enable_sqlite_pragmas(engine)
+
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        # NORMAL == 1
+        assert connection.execute(text("PRAGMA synchronous")).scalar() == 1
+        assert connection.execute(text("PRAGMA cache_size")).scalar() == -65536
+
+
+def test_create_schema_indexes_rows_that_predate_the_search_table() -> None:
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        SQLModel.metadata.create_all(connection)
+        connection.execute(
+            text(
+                "INSERT INTO image (id, file_name, media_type, prompt_text, created_at, updated_at)"
+                " VALUES ('legacy', 'old.png', 'IMAGE', 'Ancient nebula', '2024-01-01', '2024-01-01')"
+            )
+        )
+
+        create_schema(connection)
+
+        matches = connection.execute(
+            text("SELECT rowid FROM image_fts WHERE image_fts MATCH 'nebula'")
+        ).all()
+        assert len(matches) == 1
+
+
+def test_create_schema_rebuilds_a_search_table_from_an_older_tokenizer() -> None:
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        SQLModel.metadata.create_all(connection)
+        connection.exec_driver_sql(
+            "CREATE VIRTUAL TABLE image_fts USING fts5("
+            "prompt_text, notes, ai_model, content='image', content_rowid='rowid')"
+        )
+        connection.exec_driver_sql(
+            "CREATE TRIGGER image_fts_after_update AFTER UPDATE ON image BEGIN SELECT 1; END"
+        )
+        connection.execute(
+            text(
+                "INSERT INTO image (id, file_name, media_type, prompt_text, created_at, updated_at)"
+                " VALUES ('legacy', 'old.png', 'IMAGE', 'Spaceship', '2024-01-01', '2024-01-01')"
+            )
+        )
+
+        create_schema(connection)
+
+        definitions = dict(
+            connection.execute(
+                text("SELECT name, sql FROM sqlite_master WHERE name LIKE 'image_fts%'")
+            ).all()
+        )
+        assert "trigram" in definitions["image_fts"]
+        assert "UPDATE OF prompt_text, notes, ai_model" in definitions["image_fts_after_update"]
+        matches = connection.execute(
+            text("SELECT rowid FROM image_fts WHERE image_fts MATCH '\"ship\"'")
+        ).all()
+        assert len(matches) == 1
+
+
+def test_search_index_survives_renumbered_image_rowids() -> None:
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        create_schema(connection)
+    with Session(engine) as session:
+        for name, prompt in (("a.png", "Red nebula"), ("b.png", "Blue comet"), ("c.png", "Ice")):
+            session.add(models.Image(file_name=name, prompt_text=prompt))
+        session.commit()
+        # Implicit rowids are not stable (VACUUM may renumber them); shuffle
+        # them directly to make that deterministic.
+        session.exec(text("UPDATE image SET rowid = 1000 - rowid"))
+        session.commit()
+        doomed = select(models.Image).where(models.Image.file_name == "c.png")
+        session.delete(session.exec(doomed).one())
+        session.commit()
+        session.exec(text("VACUUM"))
+
+        matches = session.exec(
+            select(models.Image.file_name).where(
+                search.image_matches(search.build_match_query("nebula"))
+            )
+        ).all()
+
+    assert matches == ["a.png"]
+
+
+def test_app_engine_uses_sized_queue_pool_with_pre_ping() -> None:
+    pool = database.engine.pool
+
+    assert isinstance(pool, AsyncAdaptedQueuePool)
+    assert pool.size() == settings.db_pool_size
+    assert pool._pre_ping is True
+
+
+def test_engines_store_json_columns_through_orjson() -> None:
+    for engine in (database.engine.sync_engine, database.sync_engine):
+        assert engine.dialect._json_serializer is database._json_serializer
+        assert engine.dialect._json_deserializer is database._json_deserializer
+    # Same TEXT encoding the stdlib produced, including non-string keys.
+    assert json.loads(database._json_serializer([{"id": "a", 1: 0.5}, "p"])) == [
+        {"id": "a", "1": 0.5},
+        "p",
+    ]
+
+
+def test_json_columns_round_trip_integers_wider_than_64_bits() -> None:
+    engine = create_engine(
+        "sqlite://",
+        json_serializer=database._json_serializer,
+        json_deserializer=database._json_deserializer,
+    )
+    SQLModel.metadata.create_all(engine)
+    prompt_meta = {"seed": 2**70, "negative": -(2**63) - 1, "small": 7}
+    with Session(engine) as session:
+        session.add(
+            models.Image(file_name="wide.png", prompt_text="p", prompt_meta=prompt_meta)
+        )
+        session.commit()
+    with Session(engine) as session:
+        stored = session.exec(select(models.Image)).one().prompt_meta
+
+    assert stored == prompt_meta
+    assert type(stored["seed"]) is int
@@ -0,0 +1,222 @@
+"""File storage service tests."""
+from __future__ import annotations
+
+import io
+import shutil
+import tempfile
+
+import pytest
+from fastapi import UploadFile
+from starlette.datastructures import Headers
+
+from app.config import settings
+from app.services import files
+
+
+@pytest.fixture()
+def images_dir(tmp_path, monkeypatch):
+    target = tmp_path / "images"
+    monkeypatch.setattr(settings, "images_dir", target)
+    return target
+
+
+def make_upload(name: str, data: bytes) -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename=name)
+
+
+def make_spooled_upload(name: str, data: bytes, max_size: int) -> UploadFile:
+    spool = tempfile.SpooledTemporaryFile(max_size=max_size)
+    spool.write(data)
+    return UploadFile(file=spool, filename=name)
+
+
+@pytest.mark.parametrize(
+    ("raw", "expected"),
+    [
+        ("photo.png", "photo.png"),
+        ("../nested/my photo (1).JPG", "my_photo__1_.JPG"),
+        ("café-ß.webp", "caf_-_.webp"),
+    ],
+)
+def test_sanitize_storage_name_replaces_unsafe_characters(raw, expected):
+    assert files.sanitize_storage_name(raw) == expected
+
+
+@pytest.mark.parametrize("raw", ["", "..", "dir/.."])
+def test_sanitize_storage_name_rejects_empty_or_relative_names(raw):
+    with pytest.raises(ValueError):
+        files.sanitize_storage_name(raw)
+
+
+@pytest.mark.parametrize(
+    ("filename", "content_type", "allowed"),
+    [
+        ("photo.JPG", "image/jpeg", True),
+        ("archive.tar.png", "image/png", True),
+        (".png", "image/png", False),
+        ("photo.png", "video/mp4", False),
+        (None, "image/png", False),
+    ],
+)
+def test_is_allowed_upload_checks_suffix_and_content_type(filename, content_type, allowed):
+    upload = UploadFile(
+        file=io.BytesIO(b""), filename=filename, headers=Headers({"content-type": content_type})
+    )
+    assert files.is_allowed_upload(upload) is allowed
+
+
+def test_resolve_images_path_follows_configured_directory(images_dir, tmp_path, monkeypatch):
+    first = files._resolve_images_path("a.png")
+    assert first == images_dir.resolve() / "a.png"
+    assert images_dir.is_dir()
+
+    other = tmp_path / "other"
+    monkeypatch.setattr(settings, "images_dir", other)
+    assert files._resolve_images_path("a.png") == other.resolve() / "a.png"
+
+
+@pytest.mark.anyio
+async def test_write_paths_recreate_a_removed_images_directory(images_dir, tmp_path):
+    source = tmp_path / "source.png"
+    source.write_bytes(b"copied")
+    files._resolve_images_path("warm.png")
+
+    shutil.rmtree(images_dir)
+    synced = files.save_upload(make_upload("sync.png", b"sync"))
+    assert (images_dir / synced).read_bytes() == b"sync"
+
+    shutil.rmtree(images_dir)
+    copied = files.copy_into_images(source, "copied.png")
+    assert (images_dir / copied).read_bytes() == b"copied"
+
+    shutil.rmtree(images_dir)
+    streamed = await files.save_upload_async(make_upload("async.png", b"async"))
+    assert (images_dir / streamed).read_bytes() == b"async"
+
+
+def test_copy_into_images_keeps_existing_files_on_name_collision(images_dir, tmp_path):
+    first_source = tmp_path / "first.png"
+    second_source = tmp_path / "second.png"
+    first_source.write_bytes(b"first")
+    second_source.write_bytes(b"second")
+
+    first = files.copy_into_images(first_source, "photo.png")
+    second = files.copy_into_images(second_source, "photo.png")
+
+    assert first == "photo.png"
+    assert second != first
+    assert second.startswith("photo_") and second.endswith(".png")
+    assert (images_dir / first).read_bytes() == b"first"
+    assert (images_dir / second).read_bytes() == b"second"
+
+
+def test_save_upload_copies_disk_backed_file(images_dir, tmp_path):
+    data = b"y" * (files.UPLOAD_CHUNK_SIZE + 7)
+    source = tmp_path / "source.png"
+    source.write_bytes(data)
+
+    with source.open("rb") as handle:
+        handle.read(10)
+        stored = files.save_upload(UploadFile(file=handle, filename="source.png"))
+
+    assert (images_dir / stored).read_bytes() == data
+
+
+def test_save_upload_keeps_in_memory_spool_in_memory(images_dir):
+    upload = make_spooled_upload("memory.jpg", b"in memory", max_size=1024)
+
+    stored = files.save_upload(upload)
+
+    assert (images_dir / stored).read_bytes() == b"in memory"
+    assert not upload.file._rolled
+
+
+@pytest.mark.anyio
+async def test_save_upload_async_copies_rolled_spool_with_sendfile(images_dir, monkeypatch):
+    data = b"z" * (files.UPLOAD_CHUNK_SIZE + 11)
+    upload = make_spooled_upload("rolled.mp4", data, max_size=16)
+    calls = []
+    real_sendfile = files.os.sendfile
+
+    def tracking_sendfile(*args):
+        calls.append(args)
+        return real_sendfile(*args)
+
+    monkeypatch.setattr(files.os, "sendfile", tracking_sendfile)
+
+    stored = await files.save_upload_async(upload)
+
+    assert (images_dir / stored).read_bytes() == data
+    assert calls
+
+
+@pytest.mark.anyio
+async def test_save_upload_async_keeps_in_memory_spool_off_disk(images_dir, monkeypatch):
+    upload = make_spooled_upload("memory.png", b"small upload", max_size=1024)
+    monkeypatch.setattr(files.os, "sendfile", pytest.fail)
+
+    stored = await files.save_upload_async(upload)
+
+    assert (images_dir / stored).read_bytes() == b"small upload"
+    assert not upload.file._rolled
+
+
+@pytest.mark.anyio
+async def test_save_upload_async_streams_when_sendfile_is_unsupported(images_dir, monkeypatch):
+    data = b"q" * 64
+    upload = make_spooled_upload("rolled.png", data, max_size=16)
+
+    def unsupported_sendfile(*args):
+        raise OSError("sendfile unsupported")
+
+    monkeypatch.setattr(files.os, "sendfile", unsupported_sendfile)
+
+    stored = await files.save_upload_async(upload)
+
+    assert (images_dir / stored).read_bytes() == data
+
+
+@pytest.mark.anyio
+async def test_save_upload_async_streams_multiple_chunks(images_dir):
+    data = b"x" * (files.UPLOAD_CHUNK_SIZE * 2 + 123)
+
+    stored = await files.save_upload_async(make_upload("large.PNG", data))
+
+    assert stored.endswith(".png")
+    assert (images_dir / stored).read_bytes() == data
+
+
+@pytest.mark.anyio
+async def test_save_upload_falls_back_without_os_sendfile(images_dir, monkeypatch):
+    data = b"w" * 64
+    monkeypatch.delattr(files.os, "sendfile")
+
+    stored = files.save_upload(make_spooled_upload("rolled.png", data, max_size=16))
+    stored_async = await files.save_upload_async(
+        make_spooled_upload("rolled.png", data, max_size=16)
+    )
+
+    assert (images_dir / stored).read_bytes() == data
+    assert (images_dir / stored_async).read_bytes() == data
+
+
+@pytest.mark.anyio
+async def test_save_upload_async_handles_empty_file(images_dir):
+    stored = await files.save_upload_async(make_upload("empty.webp", b""))
+
+    assert (images_dir / stored).read_bytes() == b""
+
+
+@pytest.mark.anyio
+async def test_save_upload_async_rejects_unknown_extension(images_dir):
+    with pytest.raises(ValueError):
+        await files.save_upload_async(make_upload("notes.txt", b"text"))
+
+
+@pytest.mark.anyio
+async def test_delete_media_files_async_removes_files(images_dir):
+    stored = files.save_upload(make_upload("a.png", b"a"))
+
+    await files.delete_media_files_async(stored, None, stored)
+
+    assert not (images_dir / stored).exists()
@@ -9,6 +9,11 @@ import pytest
 
 from app.config import settings
 
+# Collection routes are declared with a trailing slash; hitting them directly
+# avoids a 307 redirect (and a resent multipart body) on every call.
+IMAGES_URL = "/api/images/"
+_EMPTY_TAGS = "[]"
+
 
 def upload_media(
     client,
@@ -22,7 +27,7 @@ def upload_media(
 ):
     body = {
         "prompt_text": prompt_text,
-        "tags": json.dumps(tags or []),
+        "tags": json.dumps(tags) if tags else _EMPTY_TAGS,
         "rating": str(rating) if rating is not None else "",
         "media_type": media_type,
         "prompt_meta": json.dumps(prompt_meta) if prompt_meta is not None else "",
@@ -41,7 +46,7 @@ def upload_media(
             io.BytesIO(b"thumb-bytes"),
             "image/png",
         )
-    response = client.post("/api/images", data=body, files=files)
+    response = client.post(IMAGES_URL, data=body, files=files)
     assert response.status_code == 201, response.text
     return response.json()
 
@@ -58,7 +63,7 @@ def test_upload_list_update_and_delete_flow(api_client):
     assert path.exists()
 
     response = api_client.get(
-        "/api/images",
+        IMAGES_URL,
         params={"q": "space", "tags": "scifi", "rating_min": 4.0, "rating_max": 5.0},
     )
     assert response.status_code == 200
@@ -67,7 +72,7 @@ def test_upload_list_update_and_delete_flow(api_client):
     assert payload["items"][0]["id"] == created["id"]
 
     update_resp = api_client.put(
-        f"/api/images/{created['id']}",
+        f"{IMAGES_URL}{created['id']}",
         json={"notes": "updated-notes", "tags": ["new", "space"]},
     )
     assert update_resp.status_code == 200
@@ -76,7 +81,7 @@ def test_upload_list_update_and_delete_flow(api_client):
     assert {tag["name"] for tag in updated["tags"]} == {"new", "space"}
 
     replace_resp = api_client.post(
-        f"/api/images/{created['id']}/file",
+        f"{IMAGES_URL}{created['id']}/file",
         files={"media_file": ("new.png", io.BytesIO(b"new-bytes"), "image/png")},
     )
     assert replace_resp.status_code == 200
@@ -85,11 +90,34 @@ def test_upload_list_update_and_delete_flow(api_client):
     new_path = settings.images_dir / replaced["file_name"]
     assert new_path.exists()
 
-    delete_resp = api_client.delete(f"/api/images/{created['id']}")
+    delete_resp = api_client.delete(f"{IMAGES_URL}{created['id']}")
     assert delete_resp.status_code == 204
     assert not new_path.exists()
 
 
+def test_update_keeps_prompt_meta_integers_wider_than_64_bits(api_client):
+    created = upload_media(api_client, prompt_text="Wide seed")
+    prompt_meta = {"seed": 2**70}
+
+    response = api_client.put(f"{IMAGES_URL}{created['id']}", json={"prompt_meta": prompt_meta})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["prompt_meta"] == prompt_meta
+    detail = api_client.get(f"{IMAGES_URL}{created['id']}").json()
+    assert detail["prompt_meta"] == prompt_meta
+
+
+def test_upload_keeps_prompt_meta_integers_wider_than_64_bits(api_client):
+    # 2**70 + 1 has no exact float form, so a float round-trip would show.
+    prompt_meta = {"seed": 2**70 + 1}
+
+    created = upload_media(api_client, prompt_text="Wide upload seed", prompt_meta=prompt_meta)
+
+    assert created["prompt_meta"] == prompt_meta
+    detail = api_client.get(f"{IMAGES_URL}{created['id']}").json()
+    assert detail["prompt_meta"] == prompt_meta
+
+
 def test_upload_invalid_captured_at_returns_422(api_client):
     files = {
         "media_file": ("sample.png", io.BytesIO(b"fake-image-bytes"), "image/png"),
@@ -97,10 +125,10 @@ def test_upload_invalid_captured_at_returns_422(api_client):
     data = {
         "prompt_text": "Invalid timestamp test",
         "captured_at": "not-a-date",
-        "tags": json.dumps([]),
+        "tags": _EMPTY_TAGS,
     }
 
-    response = api_client.post("/api/images", data=data, files=files)
+    response = api_client.post(IMAGES_URL, data=data, files=files)
 
     assert response.status_code == 422
     assert response.json()["detail"] == "captured_at must be ISO-8601 datetime"
@@ -111,13 +139,13 @@ def test_upload_video_requires_thumbnail(api_client):
     body = {
         "prompt_text": "Video without thumbnail",
         "media_type": "video",
-        "tags": json.dumps([]),
+        "tags": _EMPTY_TAGS,
     }
     files = {
         "media_file": ("clip.mp4", io.BytesIO(b"video"), "video/mp4"),
     }
 
-    response = api_client.post("/api/images", data=body, files=files)
+    response = api_client.post(IMAGES_URL, data=body, files=files)
 
     assert response.status_code == 400
     assert "thumbnail" in response.json()["detail"].lower()
@@ -134,7 +162,7 @@ def test_list_filters_support_decimal_ratings_and_media_type(api_client):
     upload_media(api_client, prompt_text="Image entry", rating=4.9)
 
     response = api_client.get(
-        "/api/images",
+        IMAGES_URL,
         params={"rating_min": 3.5, "rating_max": 4.0, "media_type": "video"},
     )
     assert response.status_code == 200
@@ -150,7 +178,7 @@ def test_detail_endpoint_returns_prompt_meta_and_thumbnail(api_client):
         prompt_meta=[{"id": "seed"}, "Prompt meta detail"],
     )
 
-    response = api_client.get(f"/api/images/{created['id']}")
+    response = api_client.get(f"{IMAGES_URL}{created['id']}")
 
     assert response.status_code == 200
     payload = response.json()
@@ -166,7 +194,7 @@ def test_detail_endpoint_includes_dependents(api_client):
         prompt_meta=[{"id": parent["id"]}, "Child referencing parent"],
     )
 
-    response = api_client.get(f"/api/images/{parent['id']}")
+    response = api_client.get(f"{IMAGES_URL}{parent['id']}")
 
     assert response.status_code == 200
     payload = response.json()
@@ -176,3 +204,101 @@ def test_detail_endpoint_includes_dependents(api_client):
     assert dependent["id"] == child["id"]
     assert dependent["file_name"] == child["file_name"]
     assert dependent["media_type"] == "image"
+
+
+def test_upload_accepts_comma_separated_tags_and_raw_prompt_meta(api_client):
+    files = {
+        "media_file": ("sample.png", io.BytesIO(b"fake-image-bytes"), "image/png"),
+    }
+    data = {
+        "prompt_text": "Comma tags",
+        "tags": "Space, galaxy ,",
+        "prompt_meta": "not json",
+    }
+
+    response = api_client.post(IMAGES_URL, data=data, files=files)
+
+    assert response.status_code == 201, response.text
+    payload = response.json()
+    assert {tag["name"] for tag in payload["tags"]} == {"space", "galaxy"}
+    assert payload["prompt_meta"] == "not json"
+
+
+def test_upload_with_invalid_thumbnail_removes_saved_media(api_client):
+    files = {
+        "media_file": ("clip.mp4", io.BytesIO(b"video"), "video/mp4"),
+        "thumbnail_file": ("thumb.gif", io.BytesIO(b"gif"), "image/gif"),
+    }
+    data = {
+        "prompt_text": "Video with bad thumbnail",
+        "media_type": "video",
+        "tags": _EMPTY_TAGS,
+    }
+
+    response = api_client.post(IMAGES_URL, data=data, files=files)
+
+    assert response.status_code == 400
+    assert not any(settings.images_dir.iterdir())
+
+
+def test_upload_accepts_utc_z_captured_at(api_client):
+    files = {
+        "media_file": ("sample.png", io.BytesIO(b"fake-image-bytes"), "image/png"),
+    }
+    data = {
+        "prompt_text": "Zulu timestamp",
+        "captured_at": "2024-03-15T12:34:56Z",
+    }
+
+    response = api_client.post(IMAGES_URL, data=data, files=files)
+
+    assert response.status_code == 201, response.text
+    assert response.json()["captured_at"].startswith("2024-03-15T12:34:56")
+
+
+def test_upload_rejects_unknown_media_type(api_client):
+    files = {
+        "media_file": ("sample.png", io.BytesIO(b"fake-image-bytes"), "image/png"),
+    }
+    data = {"prompt_text": "Bad media type", "media_type": "audio"}
+
+    response = api_client.post(IMAGES_URL, data=data, files=files)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid media_type"
+
+
+def test_list_pagination_pages_through_results_and_bounds_page_size(api_client):
+    ids = {upload_media(api_client, prompt_text=f"Paged {i}")["id"] for i in range(3)}
+
+    pages = [
+        api_client.get(IMAGES_URL, params={"page": page, "page_size": 2}).json()
+        for page in (1, 2)
+    ]
+
+    assert [page["total"] for page in pages] == [3, 3]
+    assert [len(page["items"]) for page in pages] == [2, 1]
+    assert {item["id"] for page in pages for item in page["items"]} == ids
+    assert api_client.get(IMAGES_URL, params={"page_size": 101}).status_code == 422
+    assert api_client.get(IMAGES_URL, params={"page": 0}).status_code == 422
+
+
+def test_stream_endpoint_emits_ndjson_for_all_matches(api_client):
+    first = upload_media(api_client, prompt_text="Stream one", tags=["stream"])
+    second = upload_media(api_client, prompt_text="Stream two", tags=["stream"])
+    upload_media(api_client, prompt_text="Not streamed", tags=["other"])
+
+    response = api_client.get(f"{IMAGES_URL}stream", params={"tags": "stream"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert {row["id"] for row in rows} == {first["id"], second["id"]}
+    assert all(row["tags"][0]["name"] == "stream" for row in rows)
+
+
+def test_stream_endpoint_returns_empty_body_without_matches(api_client):
+    response = api_client.get(f"{IMAGES_URL}stream", params={"q": "nothing"})
+
+    assert response.status_code == 200
+    assert response.text == ""
@@ -1,13 +1,17 @@
 """Tests for the legacy JSON import helpers."""
 from __future__ import annotations
 
+import json
+import math
 from datetime import datetime, timezone
 
 import pytest
-from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel import Session, SQLModel, create_engine, select
 
 from app import models
+from app.config import settings
 from scripts import import_legacy_json as importer
+from scripts import legacy_json_loader, legacy_media
 
 
 def test_load_entries_handles_root_image_list(tmp_path):
@@ -21,7 +25,7 @@ def test_load_entries_handles_root_image_list(tmp_path):
         ]
     }
     json_path = tmp_path / "legacy.json"
-    json_path.write_text(importer.json.dumps(payload))
+    json_path.write_text(json.dumps(payload))
 
     entries = importer.load_entries(json_path)
 
@@ -29,6 +33,74 @@ def test_load_entries_handles_root_image_list(tmp_path):
     assert entries[0]["file"] == "foo.png"
 
 
+@pytest.fixture(params=["in-memory", "streamed"])
+def parser_mode(request, monkeypatch):
+    if request.param == "streamed":
+        monkeypatch.setattr(legacy_json_loader, "STREAM_THRESHOLD_BYTES", 0)
+    return request.param
+
+
+def test_iter_entries_yields_entries_with_float_numbers(tmp_path, parser_mode):
+    json_path = tmp_path / "legacy.json"
+    json_path.write_text(
+        json.dumps(
+            {
+                "version": 2,
+                "image": [
+                    {"file": "a.png", "rating": 4.5, "prompt": [{"id": "x", "weight": 0.5}, "a"]},
+                    {"file": "b.png"},
+                ],
+                "trailing": {"image": "ignored"},
+            }
+        )
+    )
+
+    entries = importer.iter_entries(json_path)
+
+    first = next(entries)
+    assert first["file"] == "a.png"
+    assert type(first["rating"]) is float
+    assert type(first["prompt"][0]["weight"]) is float
+    assert [entry["file"] for entry in entries] == ["b.png"]
+
+
+def test_iter_entries_keeps_wide_integers_and_nan_on_both_paths(tmp_path, parser_mode):
+    json_path = tmp_path / "legacy.json"
+    json_path.write_text(
+        '{"other": [1, {"x": "}"}], "image": [{"file": "a.png", "seed": %d, "weight": NaN},'
+        ' {"file": "b.png", "weight": -Infinity}]}' % (2**70 + 1)
+    )
+
+    first, second = importer.load_entries(json_path)
+
+    assert first["seed"] == 2**70 + 1
+    assert type(first["seed"]) is int
+    assert math.isnan(first["weight"])
+    assert second["weight"] == -math.inf
+
+
+def test_streamed_entries_span_read_boundaries(tmp_path, monkeypatch):
+    monkeypatch.setattr(legacy_json_loader, "STREAM_THRESHOLD_BYTES", 0)
+    monkeypatch.setattr(legacy_json_loader, "_READ_SIZE", 3)
+    entries = [{"file": f"{index}.png", "seed": 10**20 + index} for index in range(5)]
+    json_path = tmp_path / "legacy.json"
+    json_path.write_text(json.dumps({"image": entries}, indent=2))
+
+    assert importer.load_entries(json_path) == entries
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [[{"file": "a.png"}], {"other": []}, {"image": {"file": "a.png"}}],
+)
+def test_load_entries_rejects_unexpected_shapes(tmp_path, payload, parser_mode):
+    json_path = tmp_path / "legacy.json"
+    json_path.write_text(json.dumps(payload))
+
+    with pytest.raises(ValueError):
+        importer.load_entries(json_path)
+
+
 def test_convert_entry_maps_prompt_and_date():
     legacy = {
         "id": "legacy-source",
@@ -68,6 +140,65 @@ def test_convert_entry_normalizes_decimal_ratings_and_media_type():
     assert pytest.approx(converted.payload["rating"], rel=0.001) == 4.7
 
 
+class _TaggedStr(str):
+    pass
+
+
+@pytest.mark.parametrize(
+    ("prompt", "expected"),
+    [
+        (None, ("", None, [])),
+        ("plain", ("plain", "plain", [])),
+        (_TaggedStr("sub"), ("sub", "sub", [])),
+        ({"steps": 20}, ("", {"steps": 20}, [])),
+        ([{"id": "a"}, "text"], ("text", [{"id": "a"}, "text"], [{"id": "a"}])),
+    ],
+)
+def test_normalize_prompt_dispatches_on_prompt_type(prompt, expected):
+    assert importer.normalize_prompt(prompt) == expected
+
+
+@pytest.mark.parametrize("prompt", [42, 1.5, True])
+def test_normalize_prompt_rejects_unsupported_types(prompt):
+    with pytest.raises(importer.PromptMetaFormatError):
+        importer.normalize_prompt(prompt)
+
+
+def test_convert_entry_dedupes_tags_in_first_seen_order():
+    legacy = {"file": "a.png", "prompt": "p", "tags": ["Space", " ", "art", "space "]}
+
+    assert importer.convert_entry(legacy).tags == ["space", "art"]
+
+
+@pytest.mark.parametrize(
+    ("file_name", "expected"),
+    [
+        ("clip.MKV", models.MediaType.VIDEO),
+        ("clip.webm", models.MediaType.VIDEO),
+        ("photo.jpeg", models.MediaType.IMAGE),
+        ("no-extension", models.MediaType.IMAGE),
+    ],
+)
+def test_detect_media_type_uses_video_extensions(file_name, expected):
+    assert importer.detect_media_type(file_name) == expected
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        "1704067200",
+        "1704067200000",
+        "1704067200000000",
+        "1704067200000000000",
+        1704067200,
+        "2024-01-01T00:00:00Z",
+        "2024-01-01T00:00:00+00:00",
+    ],
+)
+def test_parse_datetime_accepts_timestamps_and_iso_strings(raw):
+    assert importer.parse_datetime(raw) == datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
 def test_convert_entry_rejects_prompt_list_without_trailing_text():
     legacy = {
         "file": "broken.png",
@@ -163,3 +294,210 @@ def test_apply_reference_updates_sets_prompt_meta_and_thumbnail():
         assert updated.prompt_meta[-1] == "derived prompt"
         assert updated.thumbnail_file == "base-thumb.png"
         assert legacy_lookup["legacy-derived"]["thumbnail_file"] == "base-thumb.png"
+
+
+def test_import_entries_bulk_inserts_images_tags_and_references(tmp_path, monkeypatch):
+    source_dir = tmp_path / "legacy"
+    source_dir.mkdir()
+    for name in ("base.png", "base-thumb.png", "derived.png"):
+        (source_dir / name).write_bytes(b"data")
+    monkeypatch.setattr(settings, "images_dir", tmp_path / "images")
+    monkeypatch.setattr(importer, "IMPORT_BATCH_SIZE", 1)
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        existing_tag = models.Tag(name="scifi")
+        session.add(existing_tag)
+        session.commit()
+        existing_tag_id = existing_tag.id
+
+    monkeypatch.setattr(importer, "sync_engine", engine)
+    entries = [
+        {
+            "id": "legacy-base",
+            "file": "base.png",
+            "thumbnail_file": "base-thumb.png",
+            "prompt": "base prompt",
+            "tags": ["Space", "scifi"],
+        },
+        {
+            "id": "legacy-derived",
+            "file": "derived.png",
+            "prompt": [{"id": "legacy-base"}, "derived prompt"],
+            "tags": ["space"],
+        },
+    ]
+
+    importer.import_entries(entries, source_dir=source_dir)
+
+    with Session(engine) as session:
+        images = {image.file_name: image for image in session.exec(select(models.Image))}
+        assert set(images) == {"base.png", "derived.png"}
+        base, derived = images["base.png"], images["derived.png"]
+        assert sorted(tag.name for tag in base.tags) == ["scifi", "space"]
+        assert {tag.name: tag.id for tag in base.tags}["scifi"] == existing_tag_id
+        assert [tag.name for tag in derived.tags] == ["space"]
+        assert derived.prompt_meta == [{"id": base.id}, "derived prompt"]
+        assert derived.thumbnail_file == "base-thumb.png"
+        assert base.created_at is not None
+    assert (tmp_path / "images" / "derived.png").exists()
+
+
+def test_import_entries_restores_connection_pragmas(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'import.db'}")
+    SQLModel.metadata.create_all(engine)
+    monkeypatch.setattr(importer, "sync_engine", engine)
+
+    def pragma_values():
+        with engine.connect() as connection:
+            return [
+                connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+                for name in importer._BULK_IMPORT_PRAGMAS
+            ]
+
+    before = pragma_values()
+    with pytest.raises(FileNotFoundError):
+        importer.import_entries([{"file": "missing.png"}], source_dir=tmp_path)
+
+    assert pragma_values() == before
+
+
+def test_import_entries_dry_run_copies_and_stores_nothing(tmp_path, monkeypatch):
+    source_dir = tmp_path / "legacy"
+    source_dir.mkdir()
+    (source_dir / "photo.png").write_bytes(b"data")
+    monkeypatch.setattr(settings, "images_dir", tmp_path / "images")
+    engine = create_engine(f"sqlite:///{tmp_path / 'dry.db'}")
+    SQLModel.metadata.create_all(engine)
+    monkeypatch.setattr(importer, "sync_engine", engine)
+
+    importer.import_entries(
+        [{"file": "photo.png", "prompt": "p", "tags": ["t"]}], source_dir=source_dir, dry_run=True
+    )
+
+    with Session(engine) as session:
+        assert session.exec(select(models.Image)).all() == []
+        assert session.exec(select(models.Tag)).all() == []
+    assert not list((tmp_path / "images").glob("*"))
+
+
+def test_import_entries_propagates_inherited_thumbnails_along_reference_chains(
+    tmp_path, monkeypatch
+):
+    source_dir = tmp_path / "legacy"
+    source_dir.mkdir()
+    for name in ("a.png", "a-thumb.png", "b.png", "c.png"):
+        (source_dir / name).write_bytes(b"data")
+    monkeypatch.setattr(settings, "images_dir", tmp_path / "images")
+    engine = create_engine(f"sqlite:///{tmp_path / 'chain.db'}")
+    SQLModel.metadata.create_all(engine)
+    monkeypatch.setattr(importer, "sync_engine", engine)
+
+    importer.import_entries(
+        [
+            {"id": "a", "file": "a.png", "thumbnail_file": "a-thumb.png", "prompt": "a"},
+            {"id": "b", "file": "b.png", "prompt": [{"id": "a"}, "b"]},
+            {"id": "c", "file": "c.png", "prompt": [{"id": "b", "weight": 1}, "c"]},
+        ],
+        source_dir=source_dir,
+    )
+
+    with Session(engine) as session:
+        images = {image.prompt_text: image for image in session.exec(select(models.Image))}
+    assert images["b"].thumbnail_file == "a-thumb.png"
+    assert images["c"].thumbnail_file == "a-thumb.png"
+    assert images["c"].prompt_meta == [{"id": images["b"].id, "weight": 1}, "c"]
+
+
+def test_import_entries_rejects_video_whose_thumbnail_reference_is_unresolved(
+    tmp_path, monkeypatch
+):
+    source_dir = tmp_path / "legacy"
+    source_dir.mkdir()
+    (source_dir / "clip.mp4").write_bytes(b"data")
+    monkeypatch.setattr(settings, "images_dir", tmp_path / "images")
+    engine = create_engine(f"sqlite:///{tmp_path / 'video.db'}")
+    SQLModel.metadata.create_all(engine)
+    monkeypatch.setattr(importer, "sync_engine", engine)
+
+    with pytest.raises(ValueError, match="clip.mp4"):
+        importer.import_entries(
+            [{"id": "v", "file": "clip.mp4", "prompt": [{"id": "not-in-export"}, "v"]}],
+            source_dir=source_dir,
+        )
+
+    with Session(engine) as session:
+        assert session.exec(select(models.Image)).all() == []
+
+
+def test_import_entries_removes_copied_files_when_a_copy_fails(tmp_path, monkeypatch):
+    source_dir = tmp_path / "legacy"
+    source_dir.mkdir()
+    for name in ("a.png", "a-thumb.png", "b.png"):
+        (source_dir / name).write_bytes(b"data")
+    images_dir = tmp_path / "images"
+    monkeypatch.setattr(settings, "images_dir", images_dir)
+    engine = create_engine(f"sqlite:///{tmp_path / 'cleanup.db'}")
+    SQLModel.metadata.create_all(engine)
+    monkeypatch.setattr(importer, "sync_engine", engine)
+    monkeypatch.setattr(importer, "IMPORT_BATCH_SIZE", 1)
+    original_copy = importer.files.copy_into_images
+
+    def failing_copy(source, target_name):
+        if target_name == "b.png":
+            raise OSError("disk full")
+        return original_copy(source, target_name)
+
+    monkeypatch.setattr(importer.files, "copy_into_images", failing_copy)
+
+    with pytest.raises(OSError, match="disk full"):
+        importer.import_entries(
+            [
+                {"file": "a.png", "thumbnail_file": "a-thumb.png", "prompt": "a"},
+                {"file": "b.png", "prompt": "b"},
+            ],
+            source_dir=source_dir,
+        )
+
+    assert list(images_dir.iterdir()) == []
+    with Session(engine) as session:
+        assert session.exec(select(models.Image)).all() == []
+
+
+def test_resolve_source_file_rejects_paths_outside_export_dir(tmp_path):
+    export_dir = tmp_path / "legacy"
+    export_dir.mkdir()
+    (tmp_path / "outside.png").write_bytes(b"data")
+    (export_dir / "inside.png").write_bytes(b"data")
+    resolved = export_dir.resolve()
+
+    assert legacy_media.resolve_source_file(resolved, "inside.png") == resolved / "inside.png"
+    with pytest.raises(ValueError):
+        legacy_media.resolve_source_file(resolved, "../outside.png")
+    with pytest.raises(FileNotFoundError):
+        legacy_media.resolve_source_file(resolved, "missing.png")
+
+
+def test_resolve_source_file_rejects_symlinks_leaving_export_dir(tmp_path):
+    export_dir = tmp_path / "legacy"
+    export_dir.mkdir()
+    (tmp_path / "outside.png").write_bytes(b"data")
+    (export_dir / "inside.png").write_bytes(b"data")
+    (export_dir / "escape.png").symlink_to(tmp_path / "outside.png")
+    (export_dir / "alias.png").symlink_to(export_dir / "inside.png")
+    resolved = export_dir.resolve()
+
+    regular_files = legacy_media.regular_files(resolved)
+
+    assert regular_files == {"inside.png"}
+    with pytest.raises(ValueError):
+        legacy_media.resolve_source_file(resolved, "escape.png", regular_files)
+    assert (
+        legacy_media.resolve_source_file(resolved, "alias.png", regular_files)
+        == resolved / "inside.png"
+    )
+    assert (
+        legacy_media.resolve_source_file(resolved, "inside.png", regular_files)
+        == resolved / "inside.png"
+    )
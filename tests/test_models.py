@@ -1,88 +1,79 @@
 """SQLModel model integration tests."""
 from __future__ import annotations
 
+from datetime import datetime, timedelta, timezone
+
 import pytest
 from pydantic import ValidationError
-from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel import Session, select
 
 from app import models
 
 
-def create_in_memory_engine():
-    engine = create_engine("sqlite://", connect_args={"check_same_thread": False})
-    SQLModel.metadata.create_all(engine)
-    return engine
+def test_image_model_persists_and_defaults(model_session: Session) -> None:
+    image = models.Image(
+        file_name="foo.png",
+        prompt_text="sunset",
+        prompt_meta={"seed": 1},
+        ai_model="stable-diffusion",
+        rating=4,
+    )
+    model_session.add(image)
+    model_session.commit()
+    # Detach so the checks below load the rows back from the database.
+    model_session.expunge_all()
 
+    fetched = model_session.get(models.Image, image.id)
+    assert fetched is not None
+    assert fetched.file_name == "foo.png"
+    assert fetched.prompt_meta == {"seed": 1}
+    assert fetched.created_at is not None
+    assert fetched.updated_at is not None
 
-def test_image_model_persists_and_defaults() -> None:
-    engine = create_in_memory_engine()
-    with Session(engine) as session:
-        image = models.Image(
-            file_name="foo.png",
-            prompt_text="sunset",
-            prompt_meta={"seed": 1},
-            ai_model="stable-diffusion",
-            rating=4,
-        )
-        session.add(image)
-        session.commit()
-        session.refresh(image)
-
-        fetched = session.get(models.Image, image.id)
-        assert fetched is not None
-        assert fetched.file_name == "foo.png"
-        assert fetched.prompt_meta == {"seed": 1}
-        assert fetched.created_at is not None
-        assert fetched.updated_at is not None
-
-
-def test_image_tag_relationship_round_trip() -> None:
-    engine = create_in_memory_engine()
-    with Session(engine) as session:
-        tag = models.Tag(name="vibrant")
-        image = models.Image(file_name="bar.png", prompt_text="forest", tags=[tag])
-
-        session.add(image)
-        session.commit()
-        session.refresh(image)
-
-        fetched = session.exec(
-            select(models.Image).where(models.Image.id == image.id)
-        ).one()
-        assert fetched.tags
-        assert fetched.tags[0].name == "vibrant"
-
-        fetched_tag = session.exec(
-            select(models.Tag).where(models.Tag.id == tag.id)
-        ).one()
-        assert fetched_tag.images
-        assert fetched_tag.images[0].id == image.id
-
-
-def test_image_model_persists_media_fields_and_decimal_rating() -> None:
-    engine = create_in_memory_engine()
-    with Session(engine) as session:
-        image = models.Image(
-            file_name="baz.png",
-            media_type=models.MediaType.VIDEO,
-            thumbnail_file="baz-thumb.png",
-            prompt_text="rainy city",
-            rating=4.2,
-        )
-        session.add(image)
-        session.commit()
-        session.refresh(image)
 
-        fetched = session.get(models.Image, image.id)
-        assert fetched is not None
-        assert fetched.media_type == models.MediaType.VIDEO
-        assert fetched.thumbnail_file == "baz-thumb.png"
-        assert pytest.approx(fetched.rating, rel=0.001) == 4.2
+def test_image_tag_relationship_round_trip(model_session: Session) -> None:
+    tag = models.Tag(name="vibrant")
+    image = models.Image(file_name="bar.png", prompt_text="forest", tags=[tag])
+
+    model_session.add(image)
+    model_session.commit()
+    model_session.expunge_all()
+
+    fetched = model_session.exec(
+        select(models.Image).where(models.Image.id == image.id)
+    ).one()
+    assert fetched.tags
+    assert fetched.tags[0].name == "vibrant"
+
+    fetched_tag = model_session.exec(
+        select(models.Tag).where(models.Tag.id == tag.id)
+    ).one()
+    assert fetched_tag.images
+    assert fetched_tag.images[0].id == image.id
+
+
+def test_image_model_persists_media_fields_and_decimal_rating(model_session: Session) -> None:
+    image = models.Image(
+        file_name="baz.png",
+        media_type=models.MediaType.VIDEO,
+        thumbnail_file="baz-thumb.png",
+        prompt_text="rainy city",
+        rating=4.2,
+    )
+    model_session.add(image)
+    model_session.commit()
+    model_session.expunge_all()
+
+    fetched = model_session.get(models.Image, image.id)
+    assert fetched is not None
+    assert fetched.media_type == models.MediaType.VIDEO
+    assert fetched.thumbnail_file == "baz-thumb.png"
+    assert pytest.approx(fetched.rating, rel=0.001) == 4.2
 
 
 def test_image_prompt_meta_list_requires_trailing_prompt_text() -> None:
     with pytest.raises(ValidationError):
-        models.Image(
+        models.Image.create(
             file_name="invalid.png",
             prompt_text="ignored",
             prompt_meta=[{"id": "abc"}],
@@ -91,7 +82,7 @@ def test_image_prompt_meta_list_requires_trailing_prompt_text() -> None:
 
 def test_image_prompt_meta_references_must_be_id_only_dicts() -> None:
     with pytest.raises(ValidationError):
-        models.Image(
+        models.Image.create(
             file_name="invalid2.png",
             prompt_text="ignored",
             prompt_meta=[{"id": "abc"}, {"not_id": "oops"}, "final prompt"],
@@ -99,7 +90,7 @@ def test_image_prompt_meta_references_must_be_id_only_dicts() -> None:
 
 
 def test_image_prompt_meta_allows_extra_reference_fields() -> None:
-    image = models.Image(
+    image = models.Image.create(
         file_name="ok.png",
         prompt_text="hello",
         prompt_meta=[{"id": "abc", "weight": 0.5}, "final prompt"],
@@ -107,10 +98,48 @@ def test_image_prompt_meta_allows_extra_reference_fields() -> None:
     assert image.prompt_meta[-1] == "final prompt"
 
 
+@pytest.mark.parametrize("prompt_meta", [42, 1.5, ("tuple", "prompt")])
+def test_image_prompt_meta_rejects_unsupported_types(prompt_meta) -> None:
+    with pytest.raises(ValidationError):
+        models.Image.create(file_name="bad.png", prompt_text="p", prompt_meta=prompt_meta)
+
+
 def test_image_model_requires_thumbnail_for_videos() -> None:
     with pytest.raises(ValidationError):
-        models.Image(
+        models.Image.create(
             file_name="clip.mp4",
             prompt_text="video",
             media_type=models.MediaType.VIDEO,
         )
+
+
+def test_image_create_normalizes_rating() -> None:
+    image = models.Image.create(file_name="rated.png", prompt_text="rated", rating="4.26")
+    assert image.rating == 4.3
+
+
+def test_image_timestamps_default_to_naive_utc() -> None:
+    image = models.Image(file_name="now.png", prompt_text="now")
+
+    assert image.created_at.tzinfo is None
+    expected = datetime.now(timezone.utc).replace(tzinfo=None)
+    assert abs(expected - image.created_at) < timedelta(seconds=5)
+
+
+def test_loading_images_does_not_rerun_validator(model_session: Session, monkeypatch) -> None:
+    model_session.add(models.Image(file_name="loaded.png", prompt_text="loaded"))
+    model_session.commit()
+    model_session.expunge_all()
+
+    calls: list[dict] = []
+    original = models.ImageValidator.model_validate
+
+    def counting_validate(data, *args, **kwargs):
+        calls.append(data)
+        return original(data, *args, **kwargs)
+
+    monkeypatch.setattr(models.ImageValidator, "model_validate", counting_validate)
+    loaded = model_session.exec(select(models.Image)).all()
+
+    assert [image.file_name for image in loaded] == ["loaded.png"]
+    assert calls == []
@@ -4,6 +4,9 @@ from __future__ import annotations
 import io
 import json
 
+from app import schemas
+from app.services import tags as tag_service
+
 
 def upload(client, prompt, tags):
     data = {
@@ -11,7 +14,7 @@ def upload(client, prompt, tags):
         "tags": json.dumps(tags),
     }
     files = {"media_file": ("a.png", io.BytesIO(b"img"), "image/png")}
-    resp = client.post("/api/images", data=data, files=files)
+    resp = client.post("/api/images/", data=data, files=files)
     assert resp.status_code == 201, resp.text
     return resp.json()
 
@@ -20,9 +23,56 @@ def test_tag_listing_returns_counts(api_client):
     upload(api_client, "Galaxy view", ["space", "galaxy"])
     upload(api_client, "Another scene", ["space"])
 
-    resp = api_client.get("/api/tags")
+    resp = api_client.get("/api/tags/")
     assert resp.status_code == 200
     payload = resp.json()
     counts = {item["name"]: item["count"] for item in payload}
     assert counts["space"] == 2
     assert counts["galaxy"] == 1
+
+
+def test_tag_listing_reports_zero_for_unused_tags(api_client):
+    created = upload(api_client, "Soon untagged", ["orphan"])
+    resp = api_client.put(f"/api/images/{created['id']}", json={"tags": []})
+    assert resp.status_code == 200
+
+    resp = api_client.get("/api/tags/")
+    assert resp.status_code == 200
+    assert resp.json() == [{"name": "orphan", "count": 0}]
+
+
+def test_tag_listing_refreshes_after_upload(api_client):
+    upload(api_client, "First", ["space"])
+    first = api_client.get("/api/tags/").json()
+    assert first == [{"name": "space", "count": 1}]
+
+    upload(api_client, "Second", ["space"])
+    second = api_client.get("/api/tags/").json()
+    assert second == [{"name": "space", "count": 2}]
+
+
+def test_tag_usage_cache_expires_after_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(tag_service.time, "monotonic", lambda: now[0])
+    usage = [schemas.TagUsage(name="space", count=1)]
+
+    tag_service.store_tag_usage("db", usage, tag_service.tag_usage_generation("db"))
+    assert tag_service.cached_tag_usage("db") is usage
+
+    now[0] += tag_service.TAG_USAGE_TTL_SECONDS
+    assert tag_service.cached_tag_usage("db") is None
+    assert tag_service.cached_tag_usage("other-db") is None
+
+
+def test_tag_usage_computed_before_an_invalidation_is_not_stored():
+    usage = [schemas.TagUsage(name="space", count=1)]
+    generation = tag_service.tag_usage_generation("racing-db")
+
+    tag_service.invalidate_tag_usage()
+    tag_service.store_tag_usage("racing-db", usage, generation)
+
+    assert tag_service.cached_tag_usage("racing-db") is None
+    fresh = tag_service.tag_usage_generation("racing-db")
+    tag_service.store_tag_usage("racing-db", usage, fresh)
+    assert tag_service.cached_tag_usage("racing-db") is usage
+    tag_service.invalidate_tag_usage()